@@ -0,0 +1,206 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from . import extraction_cache, read_cache, views
+from .conditional import add_validators, editor_validators, not_modified, version_validators
+from .ingestion import extract_document, ingest_sections, previous_pages
+from .jobs import enqueue_ingestion
+from .metrics import QueryCounter, stage
+from .models import Framework, IngestionJob
+from .workers import run_in_process, run_off_loop
+
+# Async counterparts of the hot views, routed instead of the sync ones when
+# ASYNC_VIEWS is on (compliance_project/asgi.py turns it on). Reads use the
+# async ORM and cache API; pdfminer runs on the worker process pool and ORM
+# writes with their diffing on the bounded worker thread pool, so the event
+# loop stays free for fast reads while uploads are in flight.
+
+
+@require_GET
+async def get_frameworks(request):
+    return JsonResponse(await read_cache.aframeworks(), safe=False)
+
+
+@require_GET
+async def ingestion_job_status(request, job_id):
+    job = await IngestionJob.objects.filter(id=job_id).afirst()
+    if job is None:
+        raise Http404('Ingestion job not found')
+    return JsonResponse({
+        'job_id': job.id,
+        'status': job.status,
+        'progress': job.progress,
+        'version_id': job.policy_version_id,
+        'change_summary': job.change_summary if job.status == 'succeeded' else None,
+        'error': job.error or None
+    })
+
+
+@require_GET
+async def policy_diffs(request, version_id):
+    header = await read_cache.aversion_header(version_id)
+    validators = version_validators(header)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+    if header is None:
+        return JsonResponse([], safe=False)
+    body = await read_cache.aversion_diffs_body(version_id, header['fingerprint'])
+    return add_validators(HttpResponse(body, content_type='application/json'), validators)
+
+
+@require_GET
+async def edit_policy(request, version_id=None):
+    validators = None
+    if version_id:
+        header = await read_cache.aversion_header(version_id)
+        if header is None:
+            raise Http404('Policy version not found')
+        frameworks = await read_cache.aframeworks()
+        validators = editor_validators(header, frameworks)
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
+        context = {
+            'version_id': version_id,
+            'policy_title': header['policy_title'],
+            'version': header['version'],
+            'framework_id': header['framework_id'],
+            'sections': await read_cache.aversion_sections(version_id),
+            'frameworks': frameworks
+        }
+    else:
+        context = {
+            'version_id': 0,
+            'policy_title': '',
+            'version': '',
+            'framework_id': None,
+            'sections': [],
+            'frameworks': await read_cache.aframeworks()
+        }
+    return add_validators(render(request, 'editor.html', context), validators)
+
+
+@contextmanager
+def spooled_path(uploaded_file):
+    """A filesystem path for ``uploaded_file`` the process pool can open."""
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        yield uploaded_file.temporary_file_path()
+        return
+    fd, path = tempfile.mkstemp(suffix='.pdf', prefix='upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in uploaded_file.chunks():
+                out.write(chunk)
+        uploaded_file.seek(0)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def _lookup_upload(framework, title, uploaded_file):
+    digest = extraction_cache.file_digest(uploaded_file)
+    cached = extraction_cache.lookup(digest)
+    return digest, cached, previous_pages(framework, title) if cached is None else None
+
+
+def _ingest(framework, title, version, sections, uploaded_file, outline, page_texts):
+    counter = QueryCounter()
+    with counter:
+        version_obj, change_summary = ingest_sections(
+            framework, title, version, sections, uploaded_file, outline, page_texts
+        )
+    return version_obj, change_summary, counter.count
+
+
+@csrf_exempt
+async def upload_policy_pdf(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST method allowed'}, status=405)
+
+    try:
+        framework_id = int(request.POST['framework_id'])
+        title = request.POST['policy_title']
+        version = request.POST['version']
+        uploaded_file = request.FILES.get('uploaded_file')
+        text_content = request.POST.get('text_content')
+    except (KeyError, ValueError) as e:
+        return JsonResponse({'error': f'Missing or invalid input: {str(e)}'}, status=400)
+
+    if not text_content and not uploaded_file:
+        return JsonResponse({'error': 'Either text content or a PDF file must be provided'}, status=400)
+
+    framework = await Framework.objects.filter(id=framework_id).afirst()
+    if framework is None:
+        return JsonResponse({'error': 'Framework not found'}, status=404)
+
+    if request.POST.get('async') in ('1', 'true'):
+        job = await IngestionJob.objects.acreate(
+            framework=framework,
+            policy_title=title,
+            version=version,
+            source_file=None if text_content else uploaded_file,
+            text_content=text_content or ''
+        )
+        await sync_to_async(enqueue_ingestion)(job)
+        return JsonResponse({
+            'message': f'Policy "{title}" v{version} queued for ingestion.',
+            'job_id': job.id,
+            'status_url': f'/api/ingestion_jobs/{job.id}/'
+        }, status=202)
+
+    digest = None
+    cached = None
+    page_texts = None
+    if text_content:
+        with stage('parse'):
+            sections, outline, page_texts = await run_in_process(extract_document, text_content=text_content)
+    else:
+        digest, cached, known_pages = await run_off_loop(_lookup_upload, framework, title, uploaded_file)
+        if cached is None:
+            with stage('extract'), spooled_path(uploaded_file) as path:
+                sections, outline, page_texts = await run_in_process(
+                    extract_document, file_path=path, known_pages=known_pages
+                )
+
+    cache_hit = cached is not None
+    if cache_hit:
+        sections, outline = cached
+    else:
+        if not outline['lines']:
+            return JsonResponse({'error': 'Content must have at least a title'}, status=400)
+        if digest:
+            await run_off_loop(extraction_cache.store, digest, sections, outline)
+
+    version_obj, change_summary, query_count = await run_off_loop(
+        _ingest, framework, title, version, sections, uploaded_file, outline, page_texts
+    )
+
+    return JsonResponse({
+        'message': f'Policy "{title}" v{version} uploaded successfully.',
+        'version_id': version_obj.id,
+        'changes': change_summary,
+        'query_count': query_count,
+        'extraction_cache': ('hit' if cache_hit else 'miss') if digest else None
+    })
+
+
+@csrf_exempt
+@require_POST
+async def generate_pdf(request):
+    # The section writes and diffs run on the worker thread pool; the
+    # reportlab render itself is already handed to the process pool.
+    return await run_off_loop(views.generate_pdf, request)
+
+
+@csrf_exempt
+@require_POST
+async def save_sections(request, version_id):
+    return await run_off_loop(views.save_sections, request, version_id)
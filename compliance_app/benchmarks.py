@@ -0,0 +1,164 @@
+import random
+import time
+import tracemalloc
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from .metrics import QueryCounter
+
+# Synthetic corpus and measurement helpers for ``manage.py run_benchmarks``.
+
+WORDS = (
+    'access control audit backup encryption incident review logging monitoring password policy '
+    'retention risk vendor network firewall training asset inventory change approval data '
+    'classification key rotation vulnerability patch privileged account session remote device'
+).split()
+
+
+class CorpusSpec:
+    def __init__(self, frameworks=1, policies=3, sections=50, versions=5, section_length=40,
+                 change_rate=0.1, seed=0):
+        self.frameworks = frameworks
+        self.policies = policies
+        self.sections = sections
+        self.versions = versions
+        self.section_length = section_length
+        self.change_rate = change_rate
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+
+def generate_versions(spec, rng):
+    """Yield ``{section_number: content}`` maps for successive versions of one policy."""
+    numbers = []
+    for i in range(spec.sections):
+        major = i // 5 + 1
+        numbers.append(f'{major}' if i % 5 == 0 else f'{major}.{i % 5}')
+    sections = {
+        number: '\n'.join(_sentence(rng, 10) for _ in range(max(spec.section_length // 10, 1)))
+        for number in numbers
+    }
+    yield dict(sections)
+
+    for _ in range(spec.versions - 1):
+        for number in list(sections):
+            roll = rng.random()
+            if roll < spec.change_rate * 0.8:
+                lines = sections[number].split('\n')
+                lines[rng.randrange(len(lines))] = _sentence(rng, 10)
+                sections[number] = '\n'.join(lines)
+            elif roll < spec.change_rate:
+                del sections[number]
+        if rng.random() < spec.change_rate:
+            sections[f'{len(numbers) + 1}'] = _sentence(rng, spec.section_length)
+        yield dict(sections)
+
+
+def generate_corpus(spec):
+    """Yield ``(framework_index, policy_title, [version_sections, ...])``."""
+    rng = random.Random(spec.seed)
+    for framework_index in range(spec.frameworks):
+        for policy_index in range(spec.policies):
+            title = f'Synthetic policy {framework_index}-{policy_index}'
+            yield framework_index, title, list(generate_versions(spec, rng))
+
+
+def sections_to_text(title, sections):
+    lines = [title]
+    for number, content in sections.items():
+        lines.append(number)
+        lines.extend(content.split('\n'))
+    return '\n'.join(lines)
+
+
+def sections_to_pdf(title, sections):
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    y = 750
+    for line in sections_to_text(title, sections).split('\n'):
+        if y < 50:
+            pdf.showPage()
+            y = 750
+        pdf.drawString(40, y, line[:110])
+        y -= 14
+    pdf.save()
+    return buffer.getvalue()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class Recorder:
+    """Collects latency, query count and peak traced memory per operation.
+
+    The first call of each operation runs under tracemalloc to record its
+    peak allocation and is left out of the latency figures, so tracing
+    overhead does not skew the percentiles.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.queries = {}
+        self.peak_memory = {}
+
+    def measure(self, name, fn, *args, **kwargs):
+        counter = QueryCounter()
+        trace = name not in self.peak_memory
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with counter:
+            result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        if trace:
+            self.peak_memory[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            self.samples.setdefault(name, []).append(elapsed)
+        self.queries.setdefault(name, []).append(counter.count)
+        return result
+
+    def report(self):
+        results = {}
+        for name, queries in self.queries.items():
+            samples = self.samples.get(name) or [0.0]
+            results[name] = {
+                'count': len(queries),
+                'p50_ms': round(percentile(samples, 50) * 1000, 3),
+                'p90_ms': round(percentile(samples, 90) * 1000, 3),
+                'p99_ms': round(percentile(samples, 99) * 1000, 3),
+                'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+                'max_ms': round(max(samples) * 1000, 3),
+                'queries_p50': percentile(queries, 50),
+                'queries_max': max(queries),
+                'peak_memory_kb': round(self.peak_memory.get(name, 0) / 1024, 1)
+            }
+        return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Return ``[(operation, metric, baseline, current, ratio)]`` regressions."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p90_ms', 'queries_max', 'peak_memory_kb'):
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            ratio = after / before
+            if ratio > 1 + tolerance:
+                regressions.append((name, metric, before, after, round(ratio, 2)))
+    return regressions
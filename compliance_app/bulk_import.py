@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import as_completed
+
+from django.core.files import File
+
+from . import extraction_cache
+from .ingestion import extract_document, ingest_sections, previous_pages
+from .workers import process_pool
+
+
+def _sha256_path(path):
+    with open(path, 'rb') as fh:
+        return extraction_cache.file_digest(File(fh))
+
+
+def spool_documents(tmp_dir, archive=None, files=()):
+    """Copy the uploaded PDFs into ``tmp_dir``; returns ``[(filename, path)]``."""
+    documents = []
+
+    def spool(name, source):
+        path = os.path.join(tmp_dir, f'{len(documents)}.pdf')
+        with open(path, 'wb') as out:
+            shutil.copyfileobj(source, out)
+        documents.append((os.path.basename(name), path))
+
+    if archive is not None:
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.lower().endswith('.pdf'):
+                    continue
+                with zf.open(info) as member:
+                    spool(info.filename, member)
+    for uploaded in files:
+        uploaded.seek(0)
+        spool(uploaded.name, uploaded)
+    return documents
+
+
+def import_documents(framework, version, documents):
+    """Extract ``documents`` in parallel and ingest each as its own policy.
+
+    Extraction and section parsing fan out over the worker process pool;
+    each policy's sections and diffs are then committed in a separate
+    transaction as its extraction finishes. Returns the per-file manifest.
+    """
+    results = {}
+    futures = {}
+    for index, (filename, path) in enumerate(documents):
+        digest = _sha256_path(path)
+        cached = extraction_cache.lookup(digest)
+        if cached is not None:
+            sections, outline = cached
+            results[index] = _ingest(framework, version, filename, path, sections, outline)
+            continue
+        known_pages = previous_pages(framework, _title(filename))
+        future = process_pool().submit(extract_document, file_path=path, known_pages=known_pages)
+        futures[future] = (index, filename, path, digest)
+
+    for future in as_completed(futures):
+        index, filename, path, digest = futures[future]
+        try:
+            sections, outline, page_texts = future.result()
+        except Exception as e:
+            results[index] = _failed(filename, version, f'Extraction failed: {e}')
+            continue
+        extraction_cache.store(digest, sections, outline)
+        results[index] = _ingest(framework, version, filename, path, sections, outline, page_texts)
+
+    return [results[index] for index in range(len(documents))]
+
+
+def _title(filename):
+    return os.path.splitext(filename)[0]
+
+
+def _failed(filename, version, error):
+    return {
+        'file': filename,
+        'policy_title': _title(filename),
+        'version': version,
+        'status': 'failed',
+        'error': error
+    }
+
+
+def _ingest(framework, version, filename, path, sections, outline=None, page_texts=None):
+    title = _title(filename)
+    if not sections:
+        return _failed(filename, version, 'No sections found')
+    try:
+        with open(path, 'rb') as fh:
+            version_obj, change_summary = ingest_sections(
+                framework, title, version, sections, File(fh, name=filename), outline, page_texts
+            )
+    except Exception as e:
+        return _failed(filename, version, str(e))
+    return {
+        'file': filename,
+        'policy_title': title,
+        'version': version,
+        'status': 'imported',
+        'version_id': version_obj.id,
+        'stats': change_summary['stats']
+    }
+
+
+def bulk_import(framework, version, archive=None, files=()):
+    with tempfile.TemporaryDirectory(prefix='bulk-import-') as tmp_dir:
+        documents = spool_documents(tmp_dir, archive=archive, files=files)
+        return import_documents(framework, version, documents)
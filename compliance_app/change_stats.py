@@ -0,0 +1,109 @@
+from collections import defaultdict
+
+from django.apps import apps as global_apps
+from django.db.models import F
+
+from .models import ChangeStatsBucket, FrameworkChangeStats, PolicyChangeStats
+
+# Running totals of change_summary['stats'] per framework, per policy and per
+# framework and day (the version's created_at date, UTC). Every write of a
+# version's change summary folds the difference between its old and new stats
+# into the three tables inside the same transaction, so the dashboard reads
+# one row instead of scanning change_summary JSON. rebuild() recomputes them
+# from history (manage.py rebuild_change_stats).
+
+STAT_FIELDS = ('sections_added', 'sections_modified', 'sections_removed', 'sections_moved')
+COUNT_FIELDS = ('versions',) + STAT_FIELDS
+
+
+def summary_counts(summary):
+    stats = (summary or {}).get('stats') or {}
+    return {field: stats.get(field) or 0 for field in STAT_FIELDS}
+
+
+def _apply(model, lookup, delta):
+    updates = {field: F(field) + n for field, n in delta.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    # First change for this row; a concurrent writer may create it first.
+    model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+    model.objects.filter(**lookup).update(**updates)
+
+
+def record_version_stats(version_obj, old_summary, new_summary, created):
+    """Fold a version's change summary rewrite into the aggregates.
+
+    Call inside the transaction that saves ``new_summary``, as late as
+    possible: the framework rows are shared by every policy in it.
+    """
+    old, new = summary_counts(old_summary), summary_counts(new_summary)
+    delta = {field: new[field] - old[field] for field in STAT_FIELDS if new[field] != old[field]}
+    if created:
+        delta['versions'] = 1
+    if not delta:
+        return
+    framework_id = version_obj.policy.framework_id
+    _apply(FrameworkChangeStats, {'framework_id': framework_id}, delta)
+    _apply(PolicyChangeStats, {'policy_id': version_obj.policy_id}, delta)
+    _apply(ChangeStatsBucket, {'framework_id': framework_id, 'day': version_obj.created_at.date()}, delta)
+
+
+def empty_counts():
+    return dict.fromkeys(COUNT_FIELDS, 0)
+
+
+def rebuild(chunk_size=2000, framework_id=None, apps=global_apps):
+    """Recompute the aggregates from the stored change summaries.
+
+    Only ``framework_id``'s rows are rebuilt when it is given. Only the
+    stats keys are read from the JSON, never the full summaries. Migrations
+    pass their historical ``apps``. Returns the number of versions counted.
+    """
+    FrameworkChangeStats, PolicyChangeStats, ChangeStatsBucket, PolicyVersion = (
+        apps.get_model('compliance_app', name)
+        for name in ('FrameworkChangeStats', 'PolicyChangeStats', 'ChangeStatsBucket', 'PolicyVersion')
+    )
+    frameworks = defaultdict(empty_counts)
+    policies = defaultdict(empty_counts)
+    buckets = defaultdict(empty_counts)
+    versions = PolicyVersion.objects.all()
+    stale = [FrameworkChangeStats.objects.all(), PolicyChangeStats.objects.all(), ChangeStatsBucket.objects.all()]
+    if framework_id is not None:
+        versions = versions.filter(policy__framework_id=framework_id)
+        stale = [
+            stale[0].filter(framework_id=framework_id),
+            stale[1].filter(policy__framework_id=framework_id),
+            stale[2].filter(framework_id=framework_id)
+        ]
+    rows = versions.values(
+        'policy_id', 'created_at', framework_id=F('policy__framework_id'),
+        **{field: F(f'change_summary__stats__{field}') for field in STAT_FIELDS}
+    ).order_by()
+
+    counted = 0
+    for row in rows.iterator(chunk_size=chunk_size):
+        for totals in (
+            frameworks[row['framework_id']],
+            policies[row['policy_id']],
+            buckets[row['framework_id'], row['created_at'].date()],
+        ):
+            totals['versions'] += 1
+            for field in STAT_FIELDS:
+                totals[field] += row[field] or 0
+        counted += 1
+
+    for queryset in stale:
+        queryset.delete()
+    FrameworkChangeStats.objects.bulk_create(
+        [FrameworkChangeStats(framework_id=key, **totals) for key, totals in frameworks.items()],
+        batch_size=chunk_size
+    )
+    PolicyChangeStats.objects.bulk_create(
+        [PolicyChangeStats(policy_id=key, **totals) for key, totals in policies.items()],
+        batch_size=chunk_size
+    )
+    ChangeStatsBucket.objects.bulk_create(
+        [ChangeStatsBucket(framework_id=fid, day=day, **totals) for (fid, day), totals in buckets.items()],
+        batch_size=chunk_size
+    )
+    return counted
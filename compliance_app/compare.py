@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .diffing import unified_diff
+from .models import SectionBlob
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+_cache = LRUCache(getattr(settings, 'VERSION_COMPARE_CACHE_SIZE', 256))
+
+
+def section_sort_key(section_number):
+    return tuple(int(part) for part in section_number.split('.') if part.isdigit())
+
+
+def compare_versions(from_version, to_version):
+    """Section-level diff between two versions of the same policy.
+
+    Sections whose blob digests match are skipped before any text is loaded
+    or diffed. Results are cached per ``(id, fingerprint)`` of both versions;
+    every write rotates a version's fingerprint, so a rewritten version
+    misses in every process without being evicted.
+    """
+    key = ((from_version.id, from_version.fingerprint), (to_version.id, to_version.fingerprint))
+    result = _cache.get(key)
+    if result is not None:
+        return result
+
+    old = dict(from_version.sections.filter(archived=False).values_list('section_number', 'blob_id'))
+    new = dict(to_version.sections.filter(archived=False).values_list('section_number', 'blob_id'))
+
+    changed = [num for num in new if num in old and old[num] != new[num]]
+    added = [num for num in new if num not in old]
+    removed = [num for num in old if num not in new]
+
+    digests = {old[num] for num in changed + removed} | {new[num] for num in changed + added}
+    contents = dict(SectionBlob.objects.filter(digest__in=digests).values_list('digest', 'content'))
+
+    changes = []
+    for num in sorted(changed + added + removed, key=section_sort_key):
+        old_content = contents.get(old.get(num), '')
+        new_content = contents.get(new.get(num), '')
+        changes.append({
+            'section': num,
+            'type': 'modified' if num in changed else ('added' if num in new else 'removed'),
+            'diff': unified_diff(
+                old_content,
+                new_content,
+                fromfile=f'{from_version.version}:{num}' if num in old else 'original',
+                tofile=f'{to_version.version}:{num}' if num in new else 'removed'
+            )
+        })
+
+    result = {
+        'from': {'version_id': from_version.id, 'version': from_version.version},
+        'to': {'version_id': to_version.id, 'version': to_version.version},
+        'changes': changes,
+        'stats': {
+            'sections_added': len(added),
+            'sections_modified': len(changed),
+            'sections_removed': len(removed),
+            'sections_unchanged': len(new) - len(added) - len(changed)
+        }
+    }
+    _cache.set(key, result)
+    return result
@@ -0,0 +1,48 @@
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Conditional GET for version-derived resources. Validators come from the
+# stored version fingerprint (see read_cache), never from the response body,
+# so a matching poll is answered with 304 before any payload is built.
+
+
+def version_validators(header):
+    if header is None:
+        return None
+    return f'"{header["fingerprint"]}"', header['updated_at']
+
+
+def editor_validators(header, frameworks):
+    """Validators for the editor page, which also renders ``frameworks``.
+
+    The ETag covers both. There is no Last-Modified: creating a framework
+    does not touch the version's ``updated_at``.
+    """
+    if header is None:
+        return None
+    listing = hashlib.sha256(json.dumps(frameworks, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return f'"{header["fingerprint"]}-{listing}"', None
+
+
+def not_modified(request, validators):
+    """The 304 response when the client's copy is current, else ``None``."""
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return add_validators(response, validators) if response is not None else None
+
+
+def add_validators(response, validators):
+    if validators is not None:
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        patch_cache_control(response, no_cache=True)
+    return response
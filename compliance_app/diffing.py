@@ -0,0 +1,256 @@
+import difflib
+from bisect import bisect_left
+
+from django.conf import settings
+
+# Section diffs are produced by a pluggable engine chosen with the DIFF_ENGINE
+# setting ('patience', 'myers' or 'difflib'). Every engine only has to return
+# SequenceMatcher-style opcodes; grouping into hunks and the unified-diff
+# text are shared, so the output stays compatible with difflib.unified_diff.
+
+
+def intern_lines(a, b):
+    """Map the lines of ``a`` and ``b`` to small integer ids."""
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def opcodes_from_pairs(pairs, len_a, len_b):
+    """Turn an ascending list of matched ``(i, j)`` positions into opcodes."""
+    opcodes = []
+    i = j = 0
+    for pi, pj in pairs + [(len_a, len_b)]:
+        if i < pi or j < pj:
+            tag = 'replace' if i < pi and j < pj else ('delete' if i < pi else 'insert')
+            opcodes.append((tag, i, pi, j, pj))
+        if pi == len_a and pj == len_b:
+            break
+        if opcodes and opcodes[-1][0] == 'equal':
+            tag, i1, _, j1, _ = opcodes[-1]
+            opcodes[-1] = ('equal', i1, pi + 1, j1, pj + 1)
+        else:
+            opcodes.append(('equal', pi, pi + 1, pj, pj + 1))
+        i, j = pi + 1, pj + 1
+    return opcodes
+
+
+def group_opcodes(codes, n=3):
+    # Same hunk grouping as difflib.SequenceMatcher.get_grouped_opcodes.
+    if not codes:
+        codes = [('equal', 0, 1, 0, 1)]
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    nn = n + n
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal' and i2 - i1 > nn:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def _format_range(start, stop):
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f'{beginning}'
+    if not length:
+        beginning -= 1
+    return f'{beginning},{length}'
+
+
+class DiffEngine:
+    name = None
+
+    def opcodes(self, a, b):
+        raise NotImplementedError
+
+    def unified_diff(self, a, b, fromfile='', tofile='', n=3):
+        lines = []
+        for group in group_opcodes(self.opcodes(a, b), n):
+            if not lines:
+                lines.append(f'--- {fromfile}')
+                lines.append(f'+++ {tofile}')
+            first, last = group[0], group[-1]
+            lines.append(f'@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@')
+            for tag, i1, i2, j1, j2 in group:
+                if tag == 'equal':
+                    lines.extend(' ' + line for line in a[i1:i2])
+                    continue
+                if tag in ('replace', 'delete'):
+                    lines.extend('-' + line for line in a[i1:i2])
+                if tag in ('replace', 'insert'):
+                    lines.extend('+' + line for line in b[j1:j2])
+        return '\n'.join(lines)
+
+
+class DifflibEngine(DiffEngine):
+    name = 'difflib'
+
+    def opcodes(self, a, b):
+        return difflib.SequenceMatcher(None, a, b).get_opcodes()
+
+
+# Largest edit distance Myers searches before giving up on a gap. The trace
+# kept for backtracking grows as D², so a rewritten section (no common lines,
+# D = N + M) would cost seconds and hundreds of MB; past the cap the gap is
+# matched with difflib's heuristic instead, much as git limits its search.
+MYERS_MAX_EDITS = 256
+
+
+def _myers_pairs(a, b, max_edits=MYERS_MAX_EDITS):
+    """Matched positions of a shortest edit script (Myers, O((N+M)D)).
+
+    Returns ``None`` if the shortest script has more than ``max_edits`` edits.
+    """
+    n, m = len(a), len(b)
+    v = {1: 0}
+    trace = []
+    for d in range(min(n + m, max_edits) + 1):
+        trace.append(v.copy())
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]
+            else:
+                x = v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, n, m)
+    return None
+
+
+def _difflib_pairs(a, b):
+    pairs = []
+    for i, j, size in difflib.SequenceMatcher(None, a, b).get_matching_blocks():
+        pairs.extend((i + k, j + k) for k in range(size))
+    return pairs
+
+
+def _myers_backtrack(trace, x, y):
+    pairs = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1] < v[k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            pairs.append((x, y))
+        x, y = prev_x, prev_y
+    pairs.reverse()
+    return pairs
+
+
+class MyersEngine(DiffEngine):
+    name = 'myers'
+
+    def opcodes(self, a, b):
+        a_ids, b_ids = intern_lines(a, b)
+        return opcodes_from_pairs(self.match(a_ids, b_ids, 0, len(a_ids), 0, len(b_ids)), len(a), len(b))
+
+    def match(self, a, b, alo, ahi, blo, bhi):
+        pairs = []
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        suffix = []
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            suffix.append((ahi, bhi))
+        if alo < ahi and blo < bhi:
+            pairs.extend(self.match_middle(a, b, alo, ahi, blo, bhi))
+        pairs.extend(reversed(suffix))
+        return pairs
+
+    def match_middle(self, a, b, alo, ahi, blo, bhi):
+        pairs = _myers_pairs(a[alo:ahi], b[blo:bhi])
+        if pairs is None:
+            pairs = _difflib_pairs(a[alo:ahi], b[blo:bhi])
+        return [(alo + i, blo + j) for i, j in pairs]
+
+
+def _unique_anchors(a, b, alo, ahi, blo, bhi):
+    """Lines occurring exactly once on each side, in the longest common order."""
+    counts = {}
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, 0, i, 0])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[3] = j
+    candidates = sorted((i, j) for ca, cb, i, j in counts.values() if ca == 1 and cb == 1)
+
+    # Patience sorting: longest increasing subsequence of j over ascending i.
+    tails = []
+    tail_index = []
+    back = [None] * len(candidates)
+    for index, (_, j) in enumerate(candidates):
+        pos = bisect_left(tails, j)
+        back[index] = tail_index[pos - 1] if pos else None
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[pos] = j
+            tail_index[pos] = index
+
+    anchors = []
+    index = tail_index[-1] if tail_index else None
+    while index is not None:
+        anchors.append(candidates[index])
+        index = back[index]
+    anchors.reverse()
+    return anchors
+
+
+class PatienceEngine(MyersEngine):
+    """Patience diff: align on unique lines, Myers for the gaps in between."""
+
+    name = 'patience'
+
+    def match_middle(self, a, b, alo, ahi, blo, bhi):
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if not anchors:
+            return super().match_middle(a, b, alo, ahi, blo, bhi)
+        pairs = []
+        for i, j in anchors:
+            pairs.extend(self.match(a, b, alo, i, blo, j))
+            pairs.append((i, j))
+            alo, blo = i + 1, j + 1
+        pairs.extend(self.match(a, b, alo, ahi, blo, bhi))
+        return pairs
+
+
+ENGINES = {engine.name: engine for engine in (DifflibEngine, MyersEngine, PatienceEngine)}
+
+
+def get_engine(name=None):
+    return ENGINES[name or getattr(settings, 'DIFF_ENGINE', 'patience')]()
+
+
+def unified_diff(old_content, new_content, fromfile='', tofile=''):
+    return get_engine().unified_diff(old_content.splitlines(), new_content.splitlines(), fromfile, tofile)
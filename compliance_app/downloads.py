@@ -0,0 +1,73 @@
+import re
+
+from django.utils.http import parse_http_date_safe
+
+from .storage import content_digest
+
+CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+def file_etag(storage, name):
+    """Strong ETag: the content digest, or mtime and size for legacy names."""
+    digest = content_digest(name)
+    if digest:
+        return f'"{digest}"'
+    modified = storage.get_modified_time(name)
+    return f'"{int(modified.timestamp() * 1000):x}-{storage.size(name):x}"'
+
+
+def parse_range(header, size):
+    """``(start, end)`` (inclusive) for a single-range ``Range`` header.
+
+    Returns ``None`` when the whole file should be sent: no header, a
+    malformed one, or several ranges (which servers may ignore). Raises
+    ``UnsatisfiableRange`` for a range outside the file.
+    """
+    match = RANGE_PATTERN.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0 or size == 0:
+            raise UnsatisfiableRange
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise UnsatisfiableRange
+    return start, end
+
+
+def if_range_matches(header, etag, last_modified):
+    """Whether an ``If-Range`` precondition allows a partial response."""
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith('"'):
+        return header == etag
+    if header.startswith('W/'):
+        return False
+    return parse_http_date_safe(header) == int(last_modified.timestamp())
+
+
+def iter_file_range(fileobj, start, length, chunk_size=CHUNK_SIZE):
+    """Stream ``length`` bytes from ``start`` and close the file afterwards."""
+    try:
+        fileobj.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fileobj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
@@ -0,0 +1,227 @@
+from django.db import transaction
+
+from . import read_cache
+from .change_stats import record_version_stats
+from .diffing import unified_diff
+from .ingestion import (
+    content_digest, ensure_blobs, load_contents, new_fingerprint, previous_version, section_pattern
+)
+from .locking import policy_transaction
+from .metrics import stage
+from .models import PolicyVersion, PolicySection, PolicyDiff
+from .outline import link_parents, outline_fields
+from .rendering import request_render
+from .summaries import SUMMARY_FORMAT, compact_change, compact_details, summary_stats
+
+# Incremental editor saves. The client sends only the sections it changed,
+# each with the digest of the content it started from ('base_hash', None for
+# a section it is adding). Every base hash is checked against the stored
+# section under the policy's write lock before anything is written, so two
+# editors working on the same section cannot silently overwrite each other.
+
+
+class EditConflict(Exception):
+    def __init__(self, conflicts):
+        super().__init__(f'{len(conflicts)} section(s) changed since they were loaded')
+        self.conflicts = conflicts
+
+
+def parse_edits(items):
+    """Validate the ``sections`` list of a save request.
+
+    Each item is ``{'section_number', 'base_hash', 'content'}``; a ``null``
+    content removes the section. Raises ``ValueError`` on malformed input.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError('sections must be a non-empty list')
+    edits = []
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('each section must be an object')
+        sec_num = item.get('section_number')
+        base_hash = item.get('base_hash')
+        content = item.get('content')
+        if not isinstance(sec_num, str) or not section_pattern.match(sec_num):
+            raise ValueError(f'invalid section_number {sec_num!r}')
+        if sec_num in seen:
+            raise ValueError(f'section {sec_num} is listed twice')
+        if base_hash is not None and not isinstance(base_hash, str):
+            raise ValueError(f'invalid base_hash for section {sec_num}')
+        if content is not None and (not isinstance(content, str) or not content.strip()):
+            raise ValueError(f'content for section {sec_num} must be text, or null to remove it')
+        seen.add(sec_num)
+        edits.append({'section_number': sec_num, 'base_hash': base_hash, 'content': content})
+    return edits
+
+
+def _empty_summary(version_obj):
+    policy = version_obj.policy
+    return {
+        'format': SUMMARY_FORMAT,
+        'version': version_obj.version,
+        'policy_title': policy.title,
+        'framework': policy.framework.name,
+        'created_at': version_obj.created_at.isoformat(),
+        'changes': [],
+        'deprecations': []
+    }
+
+
+def apply_section_edits(version_id, edits):
+    """Apply parsed ``edits`` to the live sections of ``version_id``.
+
+    Raises ``EditConflict`` (and writes nothing) if any base hash is stale.
+    Only the edited sections are re-diffed against the previous version:
+    their PolicyDiff rows and change summary entries are replaced, the rest
+    of the version is left alone. The PDF render is requested after commit
+    and coalesced with other saves of the same version.
+    Returns ``(version_obj, saved)`` where ``saved`` maps each edited section
+    number to its new digest (None if removed).
+    """
+    numbers = [edit['section_number'] for edit in edits]
+    policy_id = PolicyVersion.objects.values_list('policy_id', flat=True).get(id=version_id)
+    with policy_transaction(policy_id):
+        version_obj = PolicyVersion.objects.select_related('policy__framework').get(id=version_id)
+        current = {
+            s.section_number: s
+            for s in PolicySection.objects.filter(version=version_obj, section_number__in=numbers)
+        }
+
+        conflicts = []
+        for edit in edits:
+            section = current.get(edit['section_number'])
+            live_hash = section.blob_id if section and not section.archived else None
+            if live_hash != edit['base_hash']:
+                conflicts.append({
+                    'section': edit['section_number'],
+                    'base_hash': edit['base_hash'],
+                    'current_hash': live_hash
+                })
+        if conflicts:
+            raise EditConflict(conflicts)
+
+        contents = {edit['section_number']: edit['content'] for edit in edits if edit['content'] is not None}
+        digests = {sec_num: content_digest(content) for sec_num, content in contents.items()}
+        with stage('blob_writes'):
+            ensure_blobs({digests[sec_num]: content for sec_num, content in contents.items()})
+
+        sections_to_update = []
+        sections_to_create = []
+        touched = []
+        relink = False
+        for sec_num in numbers:
+            section = current.get(sec_num)
+            digest = digests.get(sec_num)
+            if digest == (section.blob_id if section and not section.archived else None):
+                continue
+            touched.append(sec_num)
+            if section is None:
+                sections_to_create.append(PolicySection(
+                    version=version_obj,
+                    section_number=sec_num,
+                    blob_id=digest,
+                    archived=False,
+                    **outline_fields(sec_num)
+                ))
+                continue
+            # Removing a section or bringing an archived one back changes
+            # the live set, so parent links need recomputing.
+            relink = relink or section.archived or digest is None
+            if digest is None:
+                section.archived = True
+            else:
+                section.blob_id = digest
+                section.archived = False
+            sections_to_update.append(section)
+
+        saved = {sec_num: digests.get(sec_num) for sec_num in numbers}
+        if not touched:
+            return version_obj, saved
+
+        with stage('section_writes'):
+            if sections_to_update:
+                PolicySection.objects.bulk_update(sections_to_update, ['blob', 'archived'])
+            if sections_to_create:
+                PolicySection.objects.bulk_create(sections_to_create)
+            if relink or sections_to_create:
+                link_parents(version_obj.id)
+
+        with stage('previous_version'):
+            prev = previous_version(version_obj.policy, version_obj)
+            old_digests = {}
+            if prev:
+                old_digests = dict(
+                    prev.sections.filter(section_number__in=touched).values_list('section_number', 'blob_id')
+                )
+            old_sections = load_contents(old_digests[sec_num] for sec_num in touched if sec_num in old_digests)
+
+        summary = dict(version_obj.change_summary)
+        if summary.get('format') != SUMMARY_FORMAT:
+            summary = _empty_summary(version_obj)
+        timestamp = summary['created_at']
+        touched_set = set(touched)
+        changes = [c for c in summary.get('changes', []) if c['section'] not in touched_set]
+        deprecations = [d for d in summary.get('deprecations', []) if d['section'] not in touched_set]
+
+        diffs_to_create = []
+        for sec_num in touched:
+            old_hash = old_digests.get(sec_num)
+            new_hash = digests.get(sec_num)
+            if old_hash == new_hash:
+                continue
+            if new_hash is None:
+                if old_hash is None:
+                    continue
+                deprecations.append({
+                    'section': sec_num,
+                    'old_hash': old_hash,
+                    'removed_in_version': version_obj.version
+                })
+                diffs_to_create.append(PolicyDiff(
+                    version=version_obj,
+                    section_number=sec_num,
+                    diff_text=f"Section {sec_num} was removed",
+                    change_details={
+                        'change_type': 'removed',
+                        'old_hash': old_hash,
+                        'new_hash': None,
+                        'timestamp': timestamp
+                    }
+                ))
+                continue
+            with stage('diff'):
+                diff = unified_diff(
+                    old_sections.get(old_hash, ""),
+                    contents[sec_num],
+                    fromfile=f'{prev.version}:{sec_num}' if prev else 'original',
+                    tofile=f'{version_obj.version}:{sec_num}'
+                )
+            change = compact_change(sec_num, 'modified' if old_hash else 'added', old_hash, new_hash, diff)
+            changes.append(change)
+            diffs_to_create.append(PolicyDiff(
+                version=version_obj,
+                section_number=sec_num,
+                diff_text=diff,
+                change_details=compact_details(change, timestamp)
+            ))
+
+        with stage('summary_save'):
+            PolicyDiff.objects.filter(version=version_obj, section_number__in=touched).delete()
+            if diffs_to_create:
+                PolicyDiff.objects.bulk_create(diffs_to_create)
+
+            summary['changes'] = changes
+            summary['deprecations'] = deprecations
+            summary['stats'] = summary_stats(
+                changes, deprecations, PolicySection.objects.filter(version=version_obj, archived=False).count()
+            )
+            record_version_stats(version_obj, version_obj.change_summary, summary, False)
+            version_obj.change_summary = summary
+            version_obj.fingerprint = new_fingerprint()
+            version_obj.save(update_fields=['change_summary', 'fingerprint', 'updated_at'])
+
+        transaction.on_commit(lambda: request_render(version_id))
+
+    read_cache.invalidate_version(version_id, policy_id)
+    return version_obj, saved
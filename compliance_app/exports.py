@@ -0,0 +1,319 @@
+import io
+import json
+import os
+import zipfile
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from . import change_stats, read_cache
+from .ingestion import ensure_blobs, new_fingerprint, set_latest_version
+from .models import Framework, Policy, PolicyVersion, PolicySection, PolicyDiff, SectionBlob
+from .outline import link_parents, outline_fields
+from .storage import content_digest
+
+# Framework export: one JSON record per line, in the order an import needs
+# them: the framework, every section blob it references, then its policies,
+# versions, sections and diffs. Sections point at blobs by digest, so
+# unchanged text is exported once however many versions share it. The zip
+# form carries the same NDJSON as export.ndjson plus the stored PDFs under
+# files/<storage name>.
+#
+# Every table is read in primary-key keyset chunks rather than with one
+# .iterator() query, since the MySQL driver buffers a whole result set in
+# memory; memory use stays flat however large the framework is.
+
+EXPORT_FORMAT = 1
+EXPORT_NAME = 'export.ndjson'
+CHUNK_SIZE = 500
+# Version rows carry whole change summaries, so they are read fewer at a time.
+VERSION_CHUNK_SIZE = 20
+STREAM_CHUNK = 64 * 1024
+
+
+def _chunked(queryset, key, chunk_size=CHUNK_SIZE):
+    """Rows of the ``values()`` ``queryset`` in ``key`` order, ``chunk_size`` per query."""
+    last = None
+    while True:
+        page = queryset.order_by(key)
+        if last is not None:
+            page = page.filter(**{f'{key}__gt': last})
+        rows = list(page[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][key]
+
+
+def _file_storage():
+    return PolicyVersion._meta.get_field('uploaded_file').storage
+
+
+def _save_name(stored_name):
+    """The name to save an exported file under so it lands back at ``stored_name``."""
+    if content_digest(stored_name):
+        # policies/ab/abcd...pdf: the storage adds the ab/ shard itself.
+        shard = os.path.dirname(stored_name)
+        return os.path.join(os.path.dirname(shard), os.path.basename(stored_name))
+    return stored_name
+
+
+def iter_records(framework):
+    yield {
+        'type': 'framework',
+        'format': EXPORT_FORMAT,
+        'name': framework.name,
+        'description': framework.description
+    }
+
+    blobs = SectionBlob.objects.filter(sections__version__policy__framework=framework).distinct()
+    for row in _chunked(blobs.values('digest', 'content'), 'digest'):
+        yield {'type': 'blob', **row}
+
+    for row in _chunked(Policy.objects.filter(framework=framework).values('id', 'title'), 'id'):
+        yield {'type': 'policy', **row}
+
+    versions = PolicyVersion.objects.filter(policy__framework=framework).values(
+        'id', 'policy_id', 'version', 'created_at', 'change_summary', 'page_digests', 'uploaded_file'
+    )
+    for row in _chunked(versions, 'id', VERSION_CHUNK_SIZE):
+        yield {
+            'type': 'version',
+            'id': row['id'],
+            'policy': row['policy_id'],
+            'version': row['version'],
+            'created_at': row['created_at'].isoformat(),
+            'change_summary': row['change_summary'],
+            'page_digests': row['page_digests'],
+            'file': row['uploaded_file'] or None
+        }
+
+    sections = PolicySection.objects.filter(version__policy__framework=framework).values(
+        'id', 'version_id', 'section_number', 'blob_id', 'archived',
+        'start_page', 'start_offset', 'end_page', 'end_offset'
+    )
+    for row in _chunked(sections, 'id'):
+        location = [row['start_page'], row['start_offset'], row['end_page'], row['end_offset']]
+        yield {
+            'type': 'section',
+            'version': row['version_id'],
+            'section_number': row['section_number'],
+            'hash': row['blob_id'],
+            'archived': row['archived'],
+            'location': location if row['start_page'] is not None else None
+        }
+
+    diffs = PolicyDiff.objects.filter(version__policy__framework=framework).values(
+        'id', 'version_id', 'section_number', 'diff_text', 'change_details'
+    )
+    for row in _chunked(diffs, 'id'):
+        yield {
+            'type': 'diff',
+            'version': row['version_id'],
+            'section_number': row['section_number'],
+            'diff_text': row['diff_text'],
+            'change_details': row['change_details']
+        }
+
+
+def iter_ndjson(framework):
+    """The export as UTF-8 NDJSON, in chunks of roughly STREAM_CHUNK bytes."""
+    buffer = []
+    size = 0
+    for record in iter_records(framework):
+        line = (json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n').encode('utf-8')
+        buffer.append(line)
+        size += len(line)
+        if size >= STREAM_CHUNK:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that hands zipfile's output back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(framework):
+    """The export plus its stored PDFs as a zip, generated without seeking."""
+    return (chunk for chunk in _iter_zip(framework) if chunk)
+
+
+def _iter_zip(framework):
+    stream = _ZipStream()
+    storage = _file_storage()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(EXPORT_NAME, 'w', force_zip64=True) as entry:
+            for chunk in iter_ndjson(framework):
+                entry.write(chunk)
+                yield stream.drain()
+
+        files = (
+            PolicyVersion.objects.filter(policy__framework=framework)
+            .exclude(uploaded_file='')
+            .values('uploaded_file')
+            .distinct()
+        )
+        for row in _chunked(files, 'uploaded_file'):
+            name = row['uploaded_file']
+            if not storage.exists(name):
+                continue
+            with storage.open(name) as source, archive.open(f'files/{name}', 'w', force_zip64=True) as entry:
+                for block in iter(lambda: source.read(STREAM_CHUNK), b''):
+                    entry.write(block)
+                    yield stream.drain()
+    yield stream.drain()
+
+
+@contextmanager
+def open_export(fileobj):
+    """``(lines, open_file)`` for an NDJSON or zip export in ``fileobj``.
+
+    ``open_file(name)`` returns the stored PDF ``name`` from a zip export, or
+    ``None`` when the export does not carry it.
+    """
+    fileobj.seek(0)
+    if not zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        yield iter(fileobj), lambda name: None
+        return
+    fileobj.seek(0)
+    with zipfile.ZipFile(fileobj) as archive:
+        names = set(archive.namelist())
+        if EXPORT_NAME not in names:
+            raise ValueError(f'Zip archive has no {EXPORT_NAME}')
+
+        def open_file(name):
+            member = f'files/{name}'
+            return archive.open(member) if member in names else None
+
+        with archive.open(EXPORT_NAME) as lines:
+            yield lines, open_file
+
+
+def import_framework(lines, open_file=lambda name: None, name=None):
+    """Restore an export read from ``lines`` as a new framework.
+
+    Records are written in batches as they are read, inside one transaction.
+    Version, section and diff ids are reassigned; ``created_at`` and change
+    summaries are kept. Returns ``(framework, counts)``.
+    """
+    storage = _file_storage()
+    counts = dict.fromkeys(('policies', 'versions', 'sections', 'diffs', 'files'), 0)
+    policies = {}
+    versions = {}
+    files = {}
+    blobs = {}
+    sections = []
+    diffs = []
+
+    def flush():
+        ensure_blobs(blobs)
+        blobs.clear()
+        PolicySection.objects.bulk_create(sections)
+        counts['sections'] += len(sections)
+        sections.clear()
+        PolicyDiff.objects.bulk_create(diffs)
+        counts['diffs'] += len(diffs)
+        diffs.clear()
+
+    def restore_file(stored_name):
+        if not stored_name:
+            return ''
+        if stored_name not in files:
+            source = open_file(stored_name)
+            if source is not None:
+                with source:
+                    files[stored_name] = storage.save(_save_name(stored_name), File(source, stored_name))
+                counts['files'] += 1
+            else:
+                files[stored_name] = stored_name if storage.exists(stored_name) else ''
+        return files[stored_name]
+
+    with transaction.atomic():
+        framework = None
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.get('type')
+            if framework is None:
+                if kind != 'framework' or record.get('format') != EXPORT_FORMAT:
+                    raise ValueError('Not a framework export')
+                framework = Framework.objects.create(
+                    name=name or record['name'], description=record.get('description', '')
+                )
+            elif kind == 'blob':
+                blobs[record['digest']] = record['content']
+            elif kind == 'policy':
+                policies[record['id']] = Policy.objects.create(framework=framework, title=record['title'])
+                counts['policies'] += 1
+            elif kind == 'version':
+                version_obj = PolicyVersion.objects.create(
+                    policy=policies[record['policy']],
+                    version=record['version'],
+                    change_summary=record.get('change_summary') or {},
+                    page_digests=record.get('page_digests') or [],
+                    fingerprint=new_fingerprint(),
+                    uploaded_file=restore_file(record.get('file'))
+                )
+                PolicyVersion.objects.filter(id=version_obj.id).update(
+                    created_at=parse_datetime(record['created_at'])
+                )
+                versions[record['id']] = version_obj.id
+                counts['versions'] += 1
+            elif kind == 'section':
+                sections.append(PolicySection(
+                    version_id=versions[record['version']],
+                    section_number=record['section_number'],
+                    blob_id=record['hash'],
+                    archived=record.get('archived', False),
+                    **outline_fields(record['section_number'], record.get('location'))
+                ))
+            elif kind == 'diff':
+                diffs.append(PolicyDiff(
+                    version_id=versions[record['version']],
+                    section_number=record['section_number'],
+                    diff_text=record['diff_text'],
+                    change_details=record.get('change_details') or {}
+                ))
+            else:
+                raise ValueError(f'Unknown export record type {kind!r}')
+
+            if len(blobs) + len(sections) + len(diffs) >= CHUNK_SIZE:
+                flush()
+
+        if framework is None:
+            raise ValueError('Export is empty')
+        flush()
+
+        for version_id in versions.values():
+            link_parents(version_id)
+        for policy in policies.values():
+            latest = PolicyVersion.objects.filter(policy=policy).order_by('-created_at', '-id').first()
+            if latest is not None:
+                set_latest_version(policy, latest)
+        change_stats.rebuild(framework_id=framework.id)
+
+    read_cache.invalidate_frameworks()
+    return framework, counts
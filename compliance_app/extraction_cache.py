@@ -0,0 +1,90 @@
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .metrics import counters
+from .models import ExtractionCacheEntry, PageText
+
+# Parsed section maps (and their outline) of uploaded PDFs, keyed by the
+# SHA-256 of the file bytes, so re-uploads and retries of the same document
+# skip pdfminer.
+# Entries are evicted least-recently-used first once the stored sections
+# exceed EXTRACTION_CACHE_MAX_BYTES. The per-page text cache (PageText, see
+# ingestion.store_page_texts) is bounded the same way by
+# PAGE_TEXT_CACHE_MAX_BYTES.
+
+
+def file_digest(fileobj):
+    sha = hashlib.sha256()
+    for chunk in fileobj.chunks():
+        sha.update(chunk)
+    fileobj.seek(0)
+    return sha.hexdigest()
+
+
+def lookup(digest):
+    """``(sections, outline)`` for a cached file, or ``None``."""
+    entry = ExtractionCacheEntry.objects.filter(digest=digest).only('id', 'sections', 'outline').first()
+    if entry is None:
+        counters.increment('extraction_cache_misses')
+        return None
+    ExtractionCacheEntry.objects.filter(id=entry.id).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    counters.increment('extraction_cache_hits')
+    return entry.sections, entry.outline or None
+
+
+def store(digest, sections, outline=None):
+    size = sum(len(k) + len(v) for k, v in sections.items())
+    try:
+        with transaction.atomic():
+            ExtractionCacheEntry.objects.create(digest=digest, sections=sections, outline=outline or {}, size=size)
+    except IntegrityError:
+        return
+    evict()
+
+
+def _evict(model, max_bytes, counter):
+    total = model.objects.aggregate(total=Sum('size'))['total'] or 0
+    excess = total - max_bytes
+    if excess <= 0:
+        return
+
+    doomed = []
+    for pk, size in model.objects.order_by('last_used_at').values_list('pk', 'size').iterator():
+        doomed.append(pk)
+        excess -= size
+        if excess <= 0:
+            break
+    model.objects.filter(pk__in=doomed).delete()
+    counters.increment(counter, len(doomed))
+
+
+def evict():
+    max_bytes = getattr(settings, 'EXTRACTION_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+    _evict(ExtractionCacheEntry, max_bytes, 'extraction_cache_evictions')
+
+
+def evict_pages():
+    max_bytes = getattr(settings, 'PAGE_TEXT_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+    _evict(PageText, max_bytes, 'page_cache_evictions')
+
+
+def stats():
+    totals = ExtractionCacheEntry.objects.aggregate(bytes=Sum('size'))
+    page_totals = PageText.objects.aggregate(bytes=Sum('size'))
+    snapshot = counters.snapshot()
+    return {
+        'hits': snapshot.get('extraction_cache_hits', 0),
+        'misses': snapshot.get('extraction_cache_misses', 0),
+        'evictions': snapshot.get('extraction_cache_evictions', 0),
+        'pages_extracted': snapshot.get('pdf_pages_extracted', 0),
+        'pages_reused': snapshot.get('pdf_pages_reused', 0),
+        'page_evictions': snapshot.get('page_cache_evictions', 0),
+        'entries': ExtractionCacheEntry.objects.count(),
+        'bytes': totals['bytes'] or 0,
+        'page_entries': PageText.objects.count(),
+        'page_bytes': page_totals['bytes'] or 0
+    }
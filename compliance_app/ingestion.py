@@ -0,0 +1,528 @@
+import re
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+import weakref
+
+from django.utils import timezone
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTTextContainer
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import PDFStream, dict_value, resolve1
+from pdfminer.psparser import LIT
+
+from . import extraction_cache, read_cache
+from .change_stats import record_version_stats
+from .diffing import unified_diff
+from .locking import get_or_create_policy, policy_transaction
+from .metrics import counters, stage
+from .models import Policy, PolicyVersion, PolicySection, PolicyDiff, SectionBlob, PageText
+from .outline import link_parents, outline_fields
+from .search import index_blobs
+from .similarity import match_moves
+from .summaries import SUMMARY_FORMAT, compact_change, compact_details, summary_stats
+
+section_pattern = re.compile(r'^(\d+(\.\d+)*)$')
+PAGE_BATCH = 100
+LITERAL_FORM = LIT('Form')
+
+
+def page_digest(page):
+    """Hash what determines a page's extracted text.
+
+    Covers the page geometry, its content streams, the fonts it uses
+    (encodings and ToUnicode maps) and any form XObjects it draws, without
+    running layout analysis.
+    """
+    sha = hashlib.sha256()
+    sha.update(repr((page.mediabox, page.rotate)).encode())
+    resources = dict_value(page.resources)
+    fonts = dict_value(resources.get('Font', {}))
+    for name in sorted(fonts, key=str):
+        font = dict_value(fonts[name])
+        sha.update(repr((name, resolve1(font.get('BaseFont')), resolve1(font.get('Encoding')))).encode())
+        to_unicode = resolve1(font.get('ToUnicode'))
+        if isinstance(to_unicode, PDFStream):
+            sha.update(to_unicode.get_data())
+    xobjects = dict_value(resources.get('XObject', {}))
+    for name in sorted(xobjects, key=str):
+        xobject = resolve1(xobjects[name])
+        if isinstance(xobject, PDFStream) and xobject.get('Subtype') == LITERAL_FORM:
+            sha.update(xobject.get_data())
+    for stream in page.contents:
+        sha.update(stream.get_data())
+    return sha.hexdigest()
+
+
+def iter_pdf_pages(fileobj, known_pages=None):
+    """Yield ``(page_digest, lines, extracted)`` for each page of a PDF.
+
+    Uses pdfminer's per-page layout API, so only the layout of the page
+    being analysed is held in memory. Pages whose digest is in
+    ``known_pages`` (``{digest: lines}``, typically the previous version of
+    the same policy) reuse those lines and skip layout analysis entirely.
+    """
+    known_pages = known_pages or {}
+    resource_manager = PDFResourceManager(caching=True)
+    device = PDFPageAggregator(resource_manager, laparams=LAParams())
+    interpreter = PDFPageInterpreter(resource_manager, device)
+
+    for page in PDFPage.get_pages(fileobj):
+        digest = page_digest(page)
+        if digest in known_pages:
+            yield digest, known_pages[digest], False
+            continue
+        interpreter.process_page(page)
+        lines = []
+        for element in device.get_result():
+            if isinstance(element, LTTextContainer):
+                for line in element.get_text().splitlines():
+                    line = line.strip()
+                    if line:
+                        lines.append(line)
+        yield digest, lines, True
+
+
+def iter_located_sections(pages):
+    """Yield ``(section_number, content, location)`` from per-page line lists.
+
+    ``location`` is ``[start_page, start_offset, end_page, end_offset]``:
+    the 1-based page and line offset of the section heading and of the
+    position (exclusive) where the section ends.
+    """
+    current_section = None
+    start = None
+    end = (1, 0)
+    content_buffer = []
+
+    for page_number, lines in enumerate(pages, 1):
+        offset = -1
+        for offset, line in enumerate(lines):
+            line = line.strip()
+            if section_pattern.match(line):
+                if current_section and content_buffer:
+                    yield current_section, '\n'.join(content_buffer).strip(), [*start, page_number, offset]
+                    content_buffer = []
+                current_section = line
+                start = (page_number, offset)
+            elif current_section and line:
+                content_buffer.append(line)
+        end = (page_number, offset + 1)
+
+    if current_section and content_buffer:
+        yield current_section, '\n'.join(content_buffer).strip(), [*start, *end]
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class PageSpool:
+    """Lines of extracted pages, appended to a temporary NDJSON file.
+
+    Lets the process that extracts a PDF hand its new pages to the one that
+    stores them without either holding the document's text in memory. The
+    file lives as long as the spool; when a spool is pickled (returned from
+    the process pool) the receiving copy takes it over.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.count = 0
+        self._file = None
+        self._cleanup = None
+
+    def add(self, digest, lines):
+        if self._file is None:
+            fd, self.path = tempfile.mkstemp(prefix='pages-', suffix='.ndjson')
+            self._file = os.fdopen(fd, 'w', encoding='utf-8')
+            self._cleanup = weakref.finalize(self, _unlink, self.path)
+        self._file.write(json.dumps([digest, lines]) + '\n')
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def items(self):
+        """``(digest, lines)`` pairs, read back one page at a time."""
+        self.close()
+        if self.path is None:
+            return
+        with open(self.path, encoding='utf-8') as fh:
+            for line in fh:
+                digest, lines = json.loads(line)
+                yield digest, lines
+
+    def discard(self):
+        self.close()
+        if self._cleanup is not None:
+            self._cleanup()
+
+    def __len__(self):
+        return self.count
+
+    def __getstate__(self):
+        self.close()
+        if self._cleanup is not None:
+            self._cleanup.detach()
+        return {'path': self.path, 'count': self.count}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.path, self.count = state['path'], state['count']
+        if self.path is not None:
+            self._cleanup = weakref.finalize(self, _unlink, self.path)
+
+
+def parse_document(pages):
+    """Parse ``(page_digest, lines, extracted)`` triples.
+
+    Returns ``(sections, outline, page_texts)``: the ``{section_number:
+    content}`` map, the outline (``pages`` digests in order, each section's
+    ``locations`` and the number of text ``lines``) and a ``PageSpool`` of
+    the pages that had to be extracted, for storing in the page cache.
+    """
+    digests = []
+    page_texts = PageSpool()
+    line_count = 0
+
+    def page_lines():
+        nonlocal line_count
+        for digest, lines, extracted in pages:
+            line_count += len(lines)
+            if digest:
+                digests.append(digest)
+                if extracted:
+                    page_texts.add(digest, lines)
+            yield lines
+
+    sections = {}
+    locations = {}
+    for section_number, content, location in iter_located_sections(page_lines()):
+        sections[section_number] = content
+        locations[section_number] = location
+    page_texts.close()
+    return sections, {'pages': digests, 'locations': locations, 'lines': line_count}, page_texts
+
+
+def extract_document(file_path=None, text_content=None, known_pages=None):
+    """Extract and parse a policy document without touching the database.
+
+    Runs inside the ingestion process pool, so it only takes picklable
+    arguments and returns what ``parse_document`` does.
+    """
+    if text_content:
+        return parse_document([(None, text_content.strip().splitlines(), True)])
+    with open(file_path, 'rb') as fh:
+        return parse_document(iter_pdf_pages(fh, known_pages))
+
+
+def previous_pages(framework, title):
+    """``{page_digest: lines}`` for the latest uploaded version of a policy."""
+    digests = (
+        Policy.objects.filter(framework=framework, title=title, latest_version__isnull=False)
+        .values_list('latest_version__page_digests', flat=True)
+        .first()
+    )
+    if not digests:
+        return {}
+    return dict(PageText.objects.filter(digest__in=set(digests)).values_list('digest', 'lines'))
+
+
+def page_size(lines):
+    return sum(len(line) for line in lines)
+
+
+def _create_pages(page_texts):
+    existing = set(PageText.objects.filter(digest__in=list(page_texts)).values_list('digest', flat=True))
+    new_pages = [
+        PageText(digest=digest, lines=lines, size=page_size(lines))
+        for digest, lines in page_texts.items() if digest not in existing
+    ]
+    PageText.objects.bulk_create(new_pages, ignore_conflicts=True)
+    return bool(new_pages)
+
+
+def store_page_texts(page_texts, page_digests=()):
+    """Save newly extracted pages and mark every page in ``page_digests`` used.
+
+    ``page_texts`` is the spool from ``parse_document`` (or a ``{digest:
+    lines}`` map); it is read and written PAGE_BATCH pages at a time. Pages
+    are evicted least-recently-used first once they exceed
+    PAGE_TEXT_CACHE_MAX_BYTES; an evicted page is simply extracted again.
+    """
+    if page_digests:
+        PageText.objects.filter(digest__in=set(page_digests)).update(last_used_at=timezone.now())
+    if not page_texts:
+        return
+    created = False
+    batch = {}
+    for digest, lines in page_texts.items():
+        batch[digest] = lines
+        if len(batch) >= PAGE_BATCH:
+            created = _create_pages(batch) or created
+            batch = {}
+    if batch:
+        created = _create_pages(batch) or created
+    if created:
+        extraction_cache.evict_pages()
+
+
+def content_digest(content):
+    return hashlib.sha256(content.strip().encode('utf-8')).hexdigest()
+
+
+def ensure_blobs(contents):
+    """Store any ``{digest: content}`` entries not already in SectionBlob."""
+    if not contents:
+        return
+    existing = set(SectionBlob.objects.filter(digest__in=list(contents)).values_list('digest', flat=True))
+    new_blobs = {digest: content.strip() for digest, content in contents.items() if digest not in existing}
+    if not new_blobs:
+        return
+    SectionBlob.objects.bulk_create(
+        [SectionBlob(digest=digest, content=content) for digest, content in new_blobs.items()],
+        ignore_conflicts=True
+    )
+    index_blobs(new_blobs)
+
+
+def load_contents(digests):
+    digests = set(digests)
+    if not digests:
+        return {}
+    return dict(SectionBlob.objects.filter(digest__in=digests).values_list('digest', 'content'))
+
+
+def new_fingerprint():
+    return uuid.uuid4().hex
+
+
+def set_latest_version(policy, version_obj):
+    Policy.objects.filter(id=policy.id).update(latest_version=version_obj)
+    policy.latest_version = version_obj
+
+
+def previous_version(policy, version_obj):
+    """The newest version of ``policy`` other than ``version_obj``.
+
+    Normally answered from the ``latest_version`` pointer; only re-uploads of
+    the latest version itself need the indexed ``(policy, created_at)`` scan.
+    """
+    if policy.latest_version_id and policy.latest_version_id != version_obj.id:
+        return PolicyVersion.objects.only('id', 'version').get(id=policy.latest_version_id)
+    return (
+        PolicyVersion.objects.filter(policy=policy)
+        .exclude(id=version_obj.id)
+        .only('id', 'version')
+        .order_by('-created_at')
+        .first()
+    )
+
+
+OUTLINE_FIELDS = ['sort_key', 'depth', 'start_page', 'start_offset', 'end_page', 'end_offset']
+
+
+def ingest_sections(
+    framework, title, version, sections, uploaded_file=None, outline=None, page_texts=None, render_key=None
+):
+    """Write a parsed upload for ``title``/``version`` under ``framework``.
+
+    The section and diff delta is computed in memory first and then written
+    with bulk statements inside a single transaction, so the number of
+    queries does not depend on the number of sections. The transaction holds
+    the policy's write lock, so uploads of one policy apply in order while
+    other policies ingest in parallel. ``outline`` and ``page_texts`` are
+    the extra results of ``parse_document``; editor saves pass the
+    ``render_key`` of the PDF they expect instead.
+    Returns ``(version_obj, change_summary)``.
+    """
+    locations = (outline or {}).get('locations', {})
+    policy = get_or_create_policy(framework, title)
+    with policy_transaction(policy.id) as policy:
+        version_obj, created = PolicyVersion.objects.get_or_create(
+            policy=policy,
+            version=version,
+            defaults={'uploaded_file': uploaded_file}
+        )
+
+        if not created and uploaded_file:
+            version_obj.uploaded_file = uploaded_file
+        if render_key is not None:
+            version_obj.render_key = render_key
+
+        existing_section_map = {
+            s.section_number: s for s in PolicySection.objects.filter(version=version_obj)
+        }
+
+        if created:
+            set_latest_version(policy, version_obj)
+        with stage('previous_version'):
+            prev = previous_version(policy, version_obj)
+            old_digests = {}
+            if prev:
+                old_digests = dict(prev.sections.values_list('section_number', 'blob_id'))
+        from_label = prev.version if prev else None
+        timestamp = version_obj.created_at.isoformat()
+
+        digests = {sec_num: content_digest(content) for sec_num, content in sections.items()}
+        with stage('blob_writes'):
+            ensure_blobs({digests[sec_num]: content for sec_num, content in sections.items()})
+            store_page_texts(page_texts, (outline or {}).get('pages', ()))
+
+        sections_to_create = []
+        sections_to_update = []
+        changed = []
+        relink = False
+
+        for sec_num, digest in digests.items():
+            # Changes are always measured against the previous version, so
+            # retrying an upload rebuilds the same summary and diffs.
+            if old_digests.get(sec_num) != digest:
+                changed.append(sec_num)
+
+            section = existing_section_map.get(sec_num)
+            fields = outline_fields(sec_num, locations.get(sec_num))
+            if section:
+                relocated = any(getattr(section, name) != value for name, value in fields.items())
+                if section.blob_id == digest and not section.archived and not relocated:
+                    continue
+                relink = relink or section.archived
+                section.blob_id = digest
+                section.archived = False
+                for name, value in fields.items():
+                    setattr(section, name, value)
+                sections_to_update.append(section)
+            else:
+                sections_to_create.append(PolicySection(
+                    version=version_obj,
+                    section_number=sec_num,
+                    blob_id=digest,
+                    archived=False,
+                    **fields
+                ))
+
+        removed = sorted(set(old_digests) - set(sections))
+        with stage('previous_version'):
+            old_sections = load_contents(
+                [old_digests[sec_num] for sec_num in changed if sec_num in old_digests]
+                + [old_digests[sec_num] for sec_num in removed]
+            )
+
+        # Renumbered sections: pair removed and added sections by content.
+        added = [sec_num for sec_num in changed if sec_num not in old_digests]
+        with stage('match_moves'):
+            moves = match_moves(
+                {sec_num: old_sections.get(old_digests[sec_num], '') for sec_num in removed},
+                {sec_num: sections[sec_num] for sec_num in added}
+            )
+        moved_from = {new_num: old_num for old_num, new_num, _ in moves}
+        removed = [sec_num for sec_num in removed if sec_num not in set(moved_from.values())]
+
+        diffs_to_create = []
+        changes = []
+        deprecations = []
+
+        for sec_num in changed:
+            content = sections[sec_num]
+            old_num = moved_from.get(sec_num, sec_num)
+            old_hash = old_digests.get(old_num)
+            old_content = old_sections.get(old_hash, "")
+            if sec_num in moved_from and old_hash == digests[sec_num]:
+                diff = f"Section {old_num} was moved to {sec_num}"
+            else:
+                with stage('diff'):
+                    diff = unified_diff(
+                        old_content,
+                        content,
+                        fromfile=f'{from_label}:{old_num}' if prev else 'original',
+                        tofile=f'{version}:{sec_num}'
+                    )
+
+            if sec_num in moved_from:
+                change_type = 'moved' if old_hash == digests[sec_num] else 'moved+modified'
+            else:
+                change_type = "modified" if sec_num in old_digests else "added"
+            change = compact_change(
+                sec_num, change_type, old_hash, digests[sec_num], diff,
+                from_section=old_num if sec_num in moved_from else None
+            )
+            changes.append(change)
+
+            diffs_to_create.append(PolicyDiff(
+                version=version_obj,
+                section_number=sec_num,
+                diff_text=diff,
+                change_details=compact_details(change, timestamp)
+            ))
+
+        for sec_num in removed:
+            deprecations.append({
+                'section': sec_num,
+                'old_hash': old_digests[sec_num],
+                'removed_in_version': version
+            })
+
+            diffs_to_create.append(PolicyDiff(
+                version=version_obj,
+                section_number=sec_num,
+                diff_text=f"Section {sec_num} was removed",
+                change_details={
+                    'change_type': 'removed',
+                    'old_hash': old_digests[sec_num],
+                    'new_hash': None,
+                    'timestamp': timestamp
+                }
+            ))
+
+        stale = [num for num, s in existing_section_map.items() if num not in sections and not s.archived]
+        with stage('section_writes'):
+            if stale:
+                PolicySection.objects.filter(version=version_obj, section_number__in=stale).update(archived=True)
+            if sections_to_update:
+                PolicySection.objects.bulk_update(sections_to_update, ['blob', 'archived'] + OUTLINE_FIELDS)
+            if sections_to_create:
+                PolicySection.objects.bulk_create(sections_to_create)
+            if relink or stale or sections_to_create:
+                link_parents(version_obj.id)
+        with stage('summary_save'):
+            if not created:
+                PolicyDiff.objects.filter(version=version_obj).delete()
+            if diffs_to_create:
+                PolicyDiff.objects.bulk_create(diffs_to_create)
+
+        change_summary = {
+            'format': SUMMARY_FORMAT,
+            'version': version,
+            'policy_title': title,
+            'framework': framework.name,
+            'created_at': timestamp,
+            'changes': changes,
+            'deprecations': deprecations,
+            'stats': summary_stats(changes, deprecations, len(sections))
+        }
+
+        with stage('summary_save'):
+            record_version_stats(version_obj, version_obj.change_summary, change_summary, created)
+            version_obj.change_summary = change_summary
+            version_obj.fingerprint = new_fingerprint()
+            if outline is not None:
+                version_obj.page_digests = outline['pages']
+            version_obj.save()
+
+    if page_texts is not None and outline is not None:
+        counters.increment('pdf_pages_extracted', len(page_texts))
+        counters.increment('pdf_pages_reused', len(outline['pages']) - len(page_texts))
+    if isinstance(page_texts, PageSpool):
+        page_texts.discard()
+
+    read_cache.invalidate_version(version_obj.id, policy.id)
+    return version_obj, change_summary
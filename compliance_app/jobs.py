@@ -0,0 +1,72 @@
+import os
+import logging
+
+from django.core.files import File
+
+from . import extraction_cache
+from .ingestion import extract_document, ingest_sections, previous_pages
+from .models import IngestionJob
+from .workers import process_pool, run_in_background
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_ingestion(job):
+    return run_in_background(run_ingestion_job, job.id)
+
+
+def _update(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=list(fields) + ['updated_at'])
+
+
+def run_ingestion_job(job_id):
+    job = IngestionJob.objects.select_related('framework').get(id=job_id)
+    _update(job, status='running', progress=10)
+
+    try:
+        page_texts = None
+        if job.text_content:
+            sections, outline, page_texts = process_pool().submit(
+                extract_document, text_content=job.text_content
+            ).result()
+        else:
+            with job.source_file.open('rb') as fh:
+                digest = extraction_cache.file_digest(fh)
+            cached = extraction_cache.lookup(digest)
+            if cached is None:
+                sections, outline, page_texts = process_pool().submit(
+                    extract_document,
+                    file_path=job.source_file.path,
+                    known_pages=previous_pages(job.framework, job.policy_title)
+                ).result()
+                extraction_cache.store(digest, sections, outline)
+            else:
+                sections, outline = cached
+        _update(job, progress=60)
+
+        uploaded_file = None
+        if job.source_file:
+            uploaded_file = File(job.source_file.open('rb'), name=os.path.basename(job.source_file.name))
+        try:
+            version_obj, change_summary = ingest_sections(
+                job.framework, job.policy_title, job.version, sections, uploaded_file, outline, page_texts
+            )
+        finally:
+            if uploaded_file:
+                uploaded_file.close()
+
+        if job.source_file:
+            job.source_file.delete(save=False)
+        _update(
+            job,
+            status='succeeded',
+            progress=100,
+            policy_version=version_obj,
+            change_summary=change_summary,
+            source_file=job.source_file
+        )
+    except Exception as e:
+        logger.exception("Ingestion job %s failed", job_id)
+        _update(job, status='failed', error=str(e))
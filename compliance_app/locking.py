@@ -0,0 +1,59 @@
+import threading
+from contextlib import ExitStack, contextmanager
+
+from django.db import connection, transaction
+
+from .metrics import stage
+from .models import Framework, Policy
+
+# Writers of one policy (uploads, ingestion jobs, bulk imports, editor saves)
+# run one at a time; writers of different policies run in parallel. The lock
+# is the Policy row, taken with SELECT ... FOR UPDATE at the start of the
+# writing transaction. Backends without row locks (SQLite) fall back to one
+# process-wide writer lock: SQLite allows a single writer per database, so
+# writers of different policies would collide there anyway.
+#
+# A policy that does not exist yet has no row to lock, so it is created in a
+# short transaction of its own that locks the framework row instead.
+
+_writer_lock = threading.RLock()
+
+
+def _row_locks():
+    return connection.features.has_select_for_update
+
+
+@contextmanager
+def _held():
+    if _row_locks():
+        yield
+        return
+    with _writer_lock:
+        yield
+
+
+def get_or_create_policy(framework, title):
+    """``Policy.objects.get_or_create`` that cannot create duplicates."""
+    with _held():
+        policy = Policy.objects.filter(framework=framework, title=title).first()
+        if policy is not None:
+            return policy
+        with transaction.atomic():
+            Framework.objects.select_for_update().filter(id=framework.id).first()
+            policy, _ = Policy.objects.get_or_create(framework=framework, title=title)
+    return policy
+
+
+@contextmanager
+def policy_transaction(policy_id):
+    """``transaction.atomic()`` holding the write lock of policy ``policy_id``.
+
+    Yields the Policy re-read under the lock, so ``latest_version`` reflects
+    every writer that finished before this one.
+    """
+    with ExitStack() as stack:
+        with stage('policy_lock'):
+            stack.enter_context(_held())
+            stack.enter_context(transaction.atomic())
+            policy = Policy.objects.select_for_update().get(id=policy_id)
+        yield policy
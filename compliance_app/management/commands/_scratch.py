@@ -0,0 +1,17 @@
+from contextlib import contextmanager
+
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+)
+
+
+@contextmanager
+def scratch_database(verbosity=0):
+    """Run benchmarks against a throwaway test database, never the real one."""
+    setup_test_environment()
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+        teardown_test_environment()
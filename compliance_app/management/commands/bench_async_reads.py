@@ -0,0 +1,83 @@
+import asyncio
+import tempfile
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory, override_settings
+
+from compliance_app import async_views, workers
+from compliance_app.benchmarks import percentile, sections_to_pdf
+from compliance_app.models import Framework
+
+from ._scratch import scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Time async framework reads before and while large PDF uploads run on the worker pools. "
+        "Use --settings=compliance_project.settings_bench for SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=3)
+        parser.add_argument('--sections', type=int, default=600, help="Sections per uploaded PDF.")
+        parser.add_argument('--baseline-reads', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root, WORKER_MODE='process'), \
+                scratch_database():
+            try:
+                asyncio.run(self.run(options))
+            finally:
+                workers.shutdown()
+
+    async def run(self, options):
+        factory = AsyncRequestFactory()
+        framework = await Framework.objects.acreate(name='bench', description='')
+        pdfs = [
+            sections_to_pdf(f'Policy {seed}', {
+                str(i): f'Policy {seed} clause {i}: access to systems holding regulated data is reviewed.'
+                for i in range(1, options['sections'] + 1)
+            })
+            for seed in range(options['uploads'])
+        ]
+
+        async def read():
+            start = time.perf_counter()
+            await async_views.get_frameworks(factory.get('/api/frameworks/'))
+            return time.perf_counter() - start
+
+        async def upload(seed, pdf):
+            request = factory.post('/api/upload_policy_pdf/', {
+                'framework_id': framework.id,
+                'policy_title': f'Policy {seed}',
+                'version': '1',
+                'uploaded_file': SimpleUploadedFile(f'policy-{seed}.pdf', pdf, 'application/pdf')
+            })
+            start = time.perf_counter()
+            response = await async_views.upload_policy_pdf(request)
+            return response.status_code, time.perf_counter() - start
+
+        baseline = [await read() for _ in range(options['baseline_reads'])]
+
+        tasks = [asyncio.create_task(upload(seed, pdf)) for seed, pdf in enumerate(pdfs)]
+        under_load = []
+        while not all(task.done() for task in tasks):
+            under_load.append(await read())
+            await asyncio.sleep(0.005)
+        results = await asyncio.gather(*tasks)
+
+        self.stdout.write(f"{'reads':>14} {'count':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        for label, samples in (('idle', baseline), ('during uploads', under_load)):
+            if not samples:
+                self.stdout.write(f"{label:>14} {0:>6}")
+                continue
+            self.stdout.write(
+                f"{label:>14} {len(samples):>6} "
+                f"{percentile(samples, 50) * 1000:>8.2f} {percentile(samples, 95) * 1000:>8.2f}"
+            )
+        failed = sum(1 for status, _ in results if status != 200)
+        slowest = max(elapsed for _, elapsed in results)
+        self.stdout.write(f"slowest upload {slowest * 1000:.0f} ms, {failed} failed")
@@ -0,0 +1,65 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from compliance_app.diffing import ENGINES
+
+BOILERPLATE = [
+    "- The control owner reviews this requirement annually.",
+    "- Evidence is retained for at least twelve months.",
+    "- Exceptions require written approval from the CISO.",
+    "- Refer to the access control standard for details.",
+]
+
+
+def synthetic_section(lines, boilerplate_rate, rng):
+    section = []
+    for i in range(lines):
+        if rng.random() < boilerplate_rate:
+            section.append(rng.choice(BOILERPLATE))
+        else:
+            section.append(f"Requirement {i}: systems must log {rng.choice(['access', 'changes', 'errors'])} events.")
+    return section
+
+
+def mutate(section, change_rate, rng):
+    result = []
+    for line in section:
+        roll = rng.random()
+        if roll < change_rate / 3:
+            continue
+        if roll < 2 * change_rate / 3:
+            result.append(line + " (updated)")
+        else:
+            result.append(line)
+        if rng.random() < change_rate / 3:
+            result.append(rng.choice(BOILERPLATE))
+    return result
+
+
+class Command(BaseCommand):
+    help = "Benchmark the section diff engines on synthetic long sections with repeated lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, nargs='+', default=[500, 2000, 8000])
+        parser.add_argument('--boilerplate-rate', type=float, default=0.5)
+        parser.add_argument('--change-rate', type=float, default=0.05)
+        parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        engines = options['engines']
+        self.stdout.write(f"{'lines':>7} " + ' '.join(f"{name + ' ms':>12}" for name in engines))
+
+        for lines in options['lines']:
+            old = synthetic_section(lines, options['boilerplate_rate'], rng)
+            new = mutate(old, options['change_rate'], rng)
+            timings = []
+            for name in engines:
+                engine = ENGINES[name]()
+                start = time.perf_counter()
+                engine.unified_diff(old, new, 'old', 'new')
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(f"{lines:>7} " + ' '.join(f"{t:>12.1f}" for t in timings))
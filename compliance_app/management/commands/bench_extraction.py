@@ -0,0 +1,66 @@
+import os
+import resource
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+
+def build_pdf(path, pages, lines_per_page):
+    pdf = canvas.Canvas(path, pagesize=letter)
+    section = 0
+    for _ in range(pages):
+        y = 750
+        for line_no in range(lines_per_page):
+            if line_no % 10 == 0:
+                section += 1
+                text = str(section)
+            else:
+                text = f"Control {section}.{line_no} requires documented review of access rights and logging."
+            pdf.drawString(40, y, text)
+            y -= 17
+        pdf.showPage()
+    pdf.save()
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(path, mode):
+    from pdfminer.high_level import extract_text
+    from compliance_app.ingestion import extract_document, parse_document
+
+    baseline = _peak_rss_mb()
+    if mode == 'streaming':
+        # What uploads run in the worker pool: parse_document(iter_pdf_pages(...)).
+        sections, _, page_texts = extract_document(file_path=path)
+    else:
+        with open(path, 'rb') as fh:
+            sections, _, page_texts = parse_document([(None, extract_text(fh).strip().splitlines(), True)])
+    page_texts.discard()
+    return len(sections), baseline, _peak_rss_mb()
+
+
+class Command(BaseCommand):
+    help = "Measure peak RSS of PDF extraction against page count (streaming vs full-text)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[50, 100, 200, 400, 800])
+        parser.add_argument('--lines-per-page', type=int, default=40)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'pages':>6} {'sections':>9} {'streaming MB':>13} {'full-text MB':>13}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for pages in options['pages']:
+                path = os.path.join(tmp, f'{pages}.pdf')
+                build_pdf(path, pages, options['lines_per_page'])
+                row = {}
+                for mode in ('streaming', 'full'):
+                    # A fresh process per run, so ru_maxrss is not carried over.
+                    with ProcessPoolExecutor(max_workers=1) as pool:
+                        count, baseline, peak = pool.submit(measure, path, mode).result()
+                    row[mode] = peak - baseline
+                self.stdout.write(f"{pages:>6} {count:>9} {row['streaming']:>13.1f} {row['full']:>13.1f}")
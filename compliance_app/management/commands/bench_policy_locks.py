@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from compliance_app.ingestion import ingest_sections
+from compliance_app.models import Framework
+
+from ._scratch import scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ingestion throughput when concurrent uploads target one policy (serialized by its "
+        "row lock) and when they target different policies (which should run in parallel)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=16)
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+        parser.add_argument('--sections', type=int, default=200, help="Sections per upload.")
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(options)
+
+    def run(self, options):
+        row_locks = connection.features.has_select_for_update
+        self.stdout.write(
+            f"backend {connection.vendor}, "
+            + ("row locks" if row_locks else "no row locks: one process-wide writer lock")
+        )
+        self.stdout.write(f"{'target':>10} {'threads':>8} {'uploads':>8} {'seconds':>8} {'uploads/s':>10}")
+        for threads in options['threads']:
+            for target in ('same', 'different'):
+                elapsed = self.measure(target, threads, options)
+                self.stdout.write(
+                    f"{target:>10} {threads:>8} {options['uploads']:>8} {elapsed:>8.2f} "
+                    f"{options['uploads'] / elapsed:>10.1f}"
+                )
+
+    def measure(self, target, threads, options):
+        framework = Framework.objects.create(name=f'bench {target} {threads}', description='')
+        if target == 'same':
+            uploads = [('Policy', str(n)) for n in range(options['uploads'])]
+        else:
+            uploads = [(f'Policy {n}', '1') for n in range(options['uploads'])]
+
+        def upload(item):
+            title, version = item
+            sections = {
+                str(i): f'{title} clause {i}, revision {version if i % 5 == 0 else 0}.'
+                for i in range(1, options['sections'] + 1)
+            }
+            try:
+                ingest_sections(framework, title, version, sections)
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(upload, uploads))
+        return time.perf_counter() - start
@@ -0,0 +1,76 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from compliance_app.ingestion import previous_version
+from compliance_app.models import Framework, Policy, PolicyVersion
+
+from ._scratch import scratch_database
+
+
+def legacy_lookup(policy, version_obj):
+    prev_versions = PolicyVersion.objects.filter(policy=policy).exclude(id=version_obj.id).order_by('-created_at')
+    if prev_versions.exists():
+        return prev_versions.first()
+    return None
+
+
+def time_lookup(fn, policy, version_obj, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(policy, version_obj)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+class Command(BaseCommand):
+    help = "Time the previous-version lookup as the number of versions per policy grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--versions', type=int, nargs='+', default=[10, 100, 1000, 10000])
+        parser.add_argument('--policies', type=int, default=20,
+                            help="Other policies sharing the table, so the scan is not trivially small.")
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(options)
+
+    def run(self, options):
+        framework = Framework.objects.create(name='bench', description='')
+        now = timezone.now()
+        self.stdout.write(f"{'versions':>9} {'pointer us':>11} {'legacy us':>10}")
+
+        for count in options['versions']:
+            policies = Policy.objects.bulk_create(
+                [Policy(framework=framework, title=f'P{count}-{i}') for i in range(options['policies'])]
+            )
+            for policy in policies:
+                PolicyVersion.objects.bulk_create(
+                    [PolicyVersion(policy=policy, version=str(v), uploaded_file='') for v in range(count)],
+                    batch_size=1000
+                )
+                # auto_now_add stamps every row with the same time; spread them out.
+                ids = policy.policyversion_set.order_by('id').values_list('id', flat=True)
+                PolicyVersion.objects.bulk_update(
+                    [PolicyVersion(id=pk, created_at=now + timedelta(seconds=i)) for i, pk in enumerate(ids)],
+                    ['created_at'],
+                    batch_size=1000
+                )
+
+            policy = policies[-1]
+            latest = policy.policyversion_set.order_by('-created_at').first()
+            Policy.objects.filter(id=policy.id).update(latest_version=latest)
+            policy.refresh_from_db()
+
+            # Uploading a new version: the pointer answers directly.
+            current = PolicyVersion.objects.create(policy=policy, version='new', uploaded_file='')
+            pointer = time_lookup(previous_version, policy, current, options['repeat'])
+            legacy = time_lookup(legacy_lookup, policy, current, options['repeat'])
+            current.delete()
+
+            self.stdout.write(f"{count:>9} {pointer:>11.1f} {legacy:>10.1f}")
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from compliance_app.exports import iter_ndjson, iter_zip
+from compliance_app.models import Framework
+
+
+class Command(BaseCommand):
+    help = "Export a framework's policies, versions, sections and diffs as NDJSON, or as a zip with the stored PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('framework_id', type=int)
+        parser.add_argument('--format', choices=('ndjson', 'zip'), default='ndjson')
+        parser.add_argument('--output', help='File to write; NDJSON goes to stdout if omitted.')
+
+    def handle(self, *args, **options):
+        try:
+            framework = Framework.objects.get(id=options['framework_id'])
+        except Framework.DoesNotExist:
+            raise CommandError(f"Framework {options['framework_id']} not found")
+        if options['format'] == 'zip' and not options['output']:
+            raise CommandError('--output is required for zip exports')
+
+        chunks = iter_zip(framework) if options['format'] == 'zip' else iter_ndjson(framework)
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            return
+        written = 0
+        with open(options['output'], 'wb') as out:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        self.stdout.write(f"Exported framework {framework.id} to {options['output']} ({written} bytes).")
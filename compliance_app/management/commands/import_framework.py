@@ -0,0 +1,23 @@
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from compliance_app.exports import import_framework, open_export
+
+
+class Command(BaseCommand):
+    help = "Restore a framework from an export_framework NDJSON or zip file as a new framework."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--name', help='Name for the new framework (defaults to the exported name).')
+
+    def handle(self, *args, **options):
+        with open(options['path'], 'rb') as fh:
+            try:
+                with open_export(fh) as (lines, open_file):
+                    framework, counts = import_framework(lines, open_file, name=options['name'])
+            except (ValueError, KeyError, zipfile.BadZipFile) as e:
+                raise CommandError(f'Invalid export: {e}')
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        self.stdout.write(f"Imported framework {framework.id} ({summary}).")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from compliance_app.change_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the framework, policy and daily change statistics from all stored change summaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counted = rebuild(chunk_size=options['batch_size'])
+        self.stdout.write(f"Rebuilt change statistics from {counted} policy versions.")
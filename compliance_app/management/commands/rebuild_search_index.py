@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from compliance_app.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the section search index from all stored section blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(f"Indexed {indexed} section blobs.")
@@ -0,0 +1,146 @@
+import json
+import platform
+import random
+import tempfile
+
+import django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from compliance_app.benchmarks import (
+    CorpusSpec, Recorder, compare_to_baseline, generate_corpus, sections_to_pdf, sections_to_text
+)
+from compliance_app.models import Policy, PolicyVersion
+
+from ._scratch import scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic corpus in a throwaway database and time the upload, editor, "
+        "diff and history endpoints. Use --settings=compliance_project.settings_bench for SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--frameworks', type=int, default=1)
+        parser.add_argument('--policies', type=int, default=3)
+        parser.add_argument('--sections', type=int, default=50)
+        parser.add_argument('--versions', type=int, default=5)
+        parser.add_argument('--section-length', type=int, default=40, help="Words per section.")
+        parser.add_argument('--change-rate', type=float, default=0.1)
+        parser.add_argument('--iterations', type=int, default=5, help="Repeats of each read endpoint.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skip-pdf', action='store_true', help="Skip PDF-mode uploads.")
+        parser.add_argument('--output', default='bench_report.json')
+        parser.add_argument('--baseline', help="Report JSON to compare against.")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed relative slowdown before a metric counts as a regression.")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        spec = CorpusSpec(
+            frameworks=options['frameworks'],
+            policies=options['policies'],
+            sections=options['sections'],
+            versions=options['versions'],
+            section_length=options['section_length'],
+            change_rate=options['change_rate'],
+            seed=options['seed']
+        )
+        recorder = Recorder()
+
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root, WORKER_MODE='inline'), \
+                scratch_database():
+            vendor = connection.vendor
+            self.run(spec, recorder, options)
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': vendor,
+                'corpus': spec.as_dict(),
+                'iterations': options['iterations']
+            },
+            'results': recorder.report()
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+        self.print_report(report['results'])
+        self.stdout.write(f"Report written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+            regressions = compare_to_baseline(report['results'], baseline, options['tolerance'])
+            for name, metric, before, after, ratio in regressions:
+                self.stdout.write(self.style.WARNING(f"REGRESSION {name} {metric}: {before} -> {after} (x{ratio})"))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+            elif options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+
+    def run(self, spec, recorder, options):
+        client = Client()
+        rng = random.Random(spec.seed)
+        framework_ids = []
+        for i in range(spec.frameworks):
+            response = client.post(
+                '/api/create_framework/',
+                json.dumps({'name': f'Synthetic framework {i}', 'description': ''}),
+                content_type='application/json'
+            )
+            framework_ids.append(response.json()['framework_id'])
+
+        for framework_index, title, versions in generate_corpus(spec):
+            framework_id = framework_ids[framework_index]
+            for number, sections in enumerate(versions, start=1):
+                recorder.measure('upload_policy_pdf[text]', client.post, '/api/upload_policy_pdf/', {
+                    'framework_id': framework_id,
+                    'policy_title': title,
+                    'version': f'{number}.0',
+                    'text_content': sections_to_text(title, sections)
+                })
+                if not options['skip_pdf']:
+                    pdf = sections_to_pdf(title, sections)
+                    recorder.measure('upload_policy_pdf[pdf]', client.post, '/api/upload_policy_pdf/', {
+                        'framework_id': framework_id,
+                        'policy_title': f'{title} (pdf)',
+                        'version': f'{number}.0',
+                        'uploaded_file': SimpleUploadedFile(f'{number}.pdf', pdf, content_type='application/pdf')
+                    })
+
+            edited = dict(versions[-1])
+            for number in rng.sample(sorted(edited), max(1, int(len(edited) * spec.change_rate))):
+                edited[number] += ' Edited in the editor.'
+            recorder.measure('generate_pdf', client.post, '/api/generate_pdf/', json.dumps({
+                'title': title,
+                'version': f'{len(versions) + 1}.0',
+                'framework_id': framework_id,
+                'sections': [{'section_number': k, 'content': v} for k, v in edited.items()]
+            }), content_type='application/json')
+
+        policies = list(Policy.objects.values_list('id', flat=True))
+        versions = list(PolicyVersion.objects.values_list('id', flat=True))
+        for _ in range(options['iterations']):
+            for version_id in versions:
+                recorder.measure('policy_diffs', client.get, f'/api/policy_diffs/{version_id}/')
+                recorder.measure('edit_policy', client.get, f'/editor/{version_id}/')
+            for policy_id in policies:
+                recorder.measure('policy_change_history', client.get, f'/api/change_history/{policy_id}/')
+
+    def print_report(self, results):
+        self.stdout.write(
+            f"{'operation':<26} {'n':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KB':>9}"
+        )
+        for name, r in sorted(results.items()):
+            self.stdout.write(
+                f"{name:<26} {r['count']:>5} {r['p50_ms']:>9.2f} {r['p90_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                f"{r['queries_max']:>8} {r['peak_memory_kb']:>9.1f}"
+            )
@@ -0,0 +1,173 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection
+
+
+class Counters:
+    """Process-wide named counters (cache hits, misses, ...)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+
+counters = Counters()
+
+
+class QueryCounter:
+    """Counts the SQL statements executed on the default connection.
+
+    Usage::
+
+        counter = QueryCounter()
+        with counter:
+            ...
+        counter.count
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
+
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.setdefault(label_values, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for label_values, (bucket_counts, total, count) in sorted(series.items()):
+            labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_duration = Histogram(
+    'compliance_request_duration_seconds', 'Request latency by route.', ('route', 'method')
+)
+stage_duration = Histogram(
+    'compliance_stage_duration_seconds', 'Time spent in each pipeline stage by route.', ('route', 'stage')
+)
+request_queries = Histogram(
+    'compliance_request_queries', 'SQL queries executed per request by route.', ('route',), QUERY_BUCKETS
+)
+HISTOGRAMS = (request_duration, stage_duration, request_queries)
+
+
+class StageTimings:
+    """Per-request stage timings. Nested stages are reported as self time."""
+
+    def __init__(self):
+        self.totals = {}
+        self._stack = []
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, start, child_time = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.totals[name] = self.totals.get(name, 0.0) + elapsed - child_time
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+
+_current_timings = ContextVar('compliance_stage_timings', default=None)
+
+
+def start_request_timings():
+    timings = StageTimings()
+    return timings, _current_timings.set(timings)
+
+
+def finish_request_timings(token):
+    _current_timings.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage of the current request (no-op outside one)."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(name)
+    try:
+        yield
+    finally:
+        timings.exit()
+
+
+def timed_iterator(iterable, name):
+    """Attribute the time spent producing each item of ``iterable`` to ``name``."""
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def prometheus_exposition():
+    lines = []
+    for name, value in sorted(counters.snapshot().items()):
+        metric = 'compliance_' + re.sub(r'[^a-zA-Z0-9_]', '_', name) + '_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.exposition())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,65 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import (
+    QueryCounter, finish_request_timings, request_duration, request_queries, stage_duration,
+    start_request_timings
+)
+
+
+class RequestMetricsMiddleware:
+    """Times each request and its pipeline stages and counts its queries.
+
+    Stage timings are returned in a ``Server-Timing`` header and aggregated,
+    with the request latency and query count, into the histograms served at
+    ``/metrics``. Under ASGI the ORM runs on other threads, so async requests
+    report timings only.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings, token = start_request_timings()
+        counter = QueryCounter()
+        start = time.perf_counter()
+        try:
+            with counter:
+                response = self.get_response(request)
+        finally:
+            finish_request_timings(token)
+        self.record(request, response, timings, time.perf_counter() - start, counter.count)
+        return response
+
+    async def __acall__(self, request):
+        timings, token = start_request_timings()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request_timings(token)
+        self.record(request, response, timings, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, timings, elapsed, query_count=None):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        request_duration.observe(elapsed, route, request.method)
+        for name, seconds in timings.totals.items():
+            stage_duration.observe(seconds, route, name)
+
+        entries = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings.totals.items()]
+        if query_count is not None:
+            request_queries.observe(query_count, route)
+            entries.append(f'db;desc="{query_count} queries"')
+        entries.append(f'total;dur={elapsed * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(entries)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('policy_title', models.CharField(max_length=255)),
+                ('version', models.CharField(max_length=50)),
+                ('source_file', models.FileField(blank=True, upload_to='ingestion/')),
+                ('text_content', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('change_summary', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('framework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='compliance_app.framework')),
+                ('policy_version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='compliance_app.policyversion')),
+            ],
+        ),
+    ]
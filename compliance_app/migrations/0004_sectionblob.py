@@ -0,0 +1,81 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:05
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_blobs(apps, schema_editor):
+    PolicySection = apps.get_model('compliance_app', 'PolicySection')
+    SectionBlob = apps.get_model('compliance_app', 'SectionBlob')
+
+    batch = []
+
+    def flush():
+        blobs = {section.blob_id: section.content.strip() for section in batch}
+        SectionBlob.objects.bulk_create(
+            [SectionBlob(digest=digest, content=content) for digest, content in blobs.items()],
+            ignore_conflicts=True
+        )
+        PolicySection.objects.bulk_update(batch, ['blob'])
+        batch.clear()
+
+    for section in PolicySection.objects.order_by('id').iterator(chunk_size=1000):
+        section.blob_id = hashlib.sha256(section.content.strip().encode('utf-8')).hexdigest()
+        batch.append(section)
+        if len(batch) >= 1000:
+            flush()
+    if batch:
+        flush()
+
+
+def restore_content(apps, schema_editor):
+    PolicySection = apps.get_model('compliance_app', 'PolicySection')
+
+    batch = []
+    for section in PolicySection.objects.select_related('blob').order_by('id').iterator(chunk_size=1000):
+        section.content = section.blob.content
+        batch.append(section)
+        if len(batch) >= 1000:
+            PolicySection.objects.bulk_update(batch, ['content'])
+            batch = []
+    if batch:
+        PolicySection.objects.bulk_update(batch, ['content'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0003_extractioncacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectionBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='compliance_app.sectionblob'),
+        ),
+        migrations.RunPython(backfill_blobs, restore_content),
+        migrations.AlterField(
+            model_name='policysection',
+            name='content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='policysection',
+            name='content',
+        ),
+        migrations.AlterField(
+            model_name='policysection',
+            name='blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='compliance_app.sectionblob'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:40
+
+import hashlib
+
+from django.db import migrations
+
+
+def _digest(content):
+    return hashlib.sha256(content.strip().encode('utf-8')).hexdigest()
+
+
+def _line_stats(diff):
+    added = removed = 0
+    for line in diff.splitlines()[2:]:
+        if line.startswith('+'):
+            added += 1
+        elif line.startswith('-'):
+            removed += 1
+    return added, removed
+
+
+def compact_summaries(apps, schema_editor):
+    PolicyVersion = apps.get_model('compliance_app', 'PolicyVersion')
+    PolicyDiff = apps.get_model('compliance_app', 'PolicyDiff')
+    SectionBlob = apps.get_model('compliance_app', 'SectionBlob')
+
+    def hashed(content, blobs):
+        if not content:
+            return None
+        digest = _digest(content)
+        blobs[digest] = content.strip()
+        return digest
+
+    def save_blobs(blobs):
+        SectionBlob.objects.bulk_create(
+            [SectionBlob(digest=digest, content=content) for digest, content in blobs.items()],
+            ignore_conflicts=True
+        )
+
+    for version in PolicyVersion.objects.order_by('id').iterator(chunk_size=100):
+        summary = version.change_summary or {}
+        if summary.get('format') or not (summary.get('changes') or summary.get('deprecations')):
+            continue
+        blobs = {}
+        changes = []
+        for change in summary.get('changes', []):
+            added, removed = _line_stats(change.get('diff', ''))
+            changes.append({
+                'section': change['section'],
+                'type': change['type'],
+                'old_hash': hashed(change.get('old_content'), blobs),
+                'new_hash': hashed(change.get('new_content'), blobs),
+                'lines_added': added,
+                'lines_removed': removed
+            })
+        deprecations = [
+            {
+                'section': d['section'],
+                'old_hash': hashed(d.get('content'), blobs),
+                'removed_in_version': d.get('removed_in_version')
+            }
+            for d in summary.get('deprecations', [])
+        ]
+        save_blobs(blobs)
+        version.change_summary = {**summary, 'format': 2, 'changes': changes, 'deprecations': deprecations}
+        version.save(update_fields=['change_summary'])
+
+    batch = []
+    for diff in PolicyDiff.objects.order_by('id').iterator(chunk_size=500):
+        details = diff.change_details or {}
+        if 'old_content' not in details:
+            continue
+        blobs = {}
+        diff.change_details = {
+            'change_type': details.get('change_type'),
+            'old_hash': hashed(details.get('old_content'), blobs),
+            'new_hash': hashed(details.get('new_content'), blobs),
+            'timestamp': details.get('timestamp')
+        }
+        save_blobs(blobs)
+        batch.append(diff)
+        if len(batch) >= 500:
+            PolicyDiff.objects.bulk_update(batch, ['change_details'])
+            batch = []
+    if batch:
+        PolicyDiff.objects.bulk_update(batch, ['change_details'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0004_sectionblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_latest_version(apps, schema_editor):
+    Policy = apps.get_model('compliance_app', 'Policy')
+    PolicyVersion = apps.get_model('compliance_app', 'PolicyVersion')
+    Policy.objects.update(latest_version=Subquery(
+        PolicyVersion.objects.filter(policy=OuterRef('pk')).order_by('-created_at', '-id').values('id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0005_compact_change_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='latest_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='compliance_app.policyversion'),
+        ),
+        migrations.AddIndex(
+            model_name='policydiff',
+            index=models.Index(fields=['version', 'section_number'], name='compliance__version_e3e444_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='policysection',
+            index=models.Index(fields=['version', 'archived'], name='compliance__version_8cb8ed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='policyversion',
+            index=models.Index(fields=['policy', 'created_at'], name='compliance__policy__f3a6dc_idx'),
+        ),
+        migrations.RunPython(backfill_latest_version, migrations.RunPython.noop),
+    ]
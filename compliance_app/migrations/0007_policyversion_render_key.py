@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0006_latest_version_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policyversion',
+            name='render_key',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
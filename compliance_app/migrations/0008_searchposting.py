@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0007_policyversion_render_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField(default=1)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='compliance_app.sectionblob')),
+            ],
+            options={
+                'unique_together': {('term', 'blob')},
+            },
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_outline(apps, schema_editor):
+    PolicySection = apps.get_model('compliance_app', 'PolicySection')
+    version_ids = PolicySection.objects.values_list('version_id', flat=True).distinct()
+    for version_id in version_ids.iterator():
+        rows = list(PolicySection.objects.filter(version_id=version_id).only('id', 'section_number', 'archived'))
+        live = {row.section_number: row.id for row in rows if not row.archived}
+        for row in rows:
+            parts = row.section_number.split('.')
+            row.sort_key = '.'.join(part.zfill(6) for part in parts)
+            row.depth = len(parts) - 1
+            row.parent_id = None
+            while not row.archived and len(parts) > 1:
+                parts.pop()
+                row.parent_id = live.get('.'.join(parts))
+                if row.parent_id:
+                    break
+        PolicySection.objects.bulk_update(rows, ['sort_key', 'depth', 'parent'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0008_searchposting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageText',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('lines', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='policysection',
+            name='compliance__version_8cb8ed_idx',
+        ),
+        migrations.AddField(
+            model_name='extractioncacheentry',
+            name='outline',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='end_offset',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='end_page',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='compliance_app.policysection'),
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='sort_key',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='start_offset',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='policysection',
+            name='start_page',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='policyversion',
+            name='page_digests',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='policysection',
+            index=models.Index(fields=['version', 'archived', 'sort_key'], name='compliance__version_42d0b2_idx'),
+        ),
+        migrations.RunPython(backfill_outline, migrations.RunPython.noop),
+    ]
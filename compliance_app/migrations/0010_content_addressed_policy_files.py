@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:55
+
+import compliance_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0009_section_outline'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='policyversion',
+            name='uploaded_file',
+            field=models.FileField(storage=compliance_app.storage.policy_storage, upload_to='policies/'),
+        ),
+    ]
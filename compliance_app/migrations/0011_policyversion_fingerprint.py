@@ -0,0 +1,36 @@
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_fingerprints(apps, schema_editor):
+    PolicyVersion = apps.get_model('compliance_app', 'PolicyVersion')
+    PolicyVersion.objects.update(updated_at=F('created_at'))
+    versions = list(PolicyVersion.objects.only('id'))
+    for version in versions:
+        version.fingerprint = uuid.uuid4().hex
+    PolicyVersion.objects.bulk_update(versions, ['fingerprint'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0010_content_addressed_policy_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policyversion',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='policyversion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0011_policyversion_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrameworkChangeStats',
+            fields=[
+                ('versions', models.IntegerField(default=0)),
+                ('sections_added', models.IntegerField(default=0)),
+                ('sections_modified', models.IntegerField(default=0)),
+                ('sections_removed', models.IntegerField(default=0)),
+                ('sections_moved', models.IntegerField(default=0)),
+                ('framework', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_stats', serialize=False, to='compliance_app.framework')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PolicyChangeStats',
+            fields=[
+                ('versions', models.IntegerField(default=0)),
+                ('sections_added', models.IntegerField(default=0)),
+                ('sections_modified', models.IntegerField(default=0)),
+                ('sections_removed', models.IntegerField(default=0)),
+                ('sections_moved', models.IntegerField(default=0)),
+                ('policy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_stats', serialize=False, to='compliance_app.policy')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeStatsBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('versions', models.IntegerField(default=0)),
+                ('sections_added', models.IntegerField(default=0)),
+                ('sections_modified', models.IntegerField(default=0)),
+                ('sections_removed', models.IntegerField(default=0)),
+                ('sections_moved', models.IntegerField(default=0)),
+                ('day', models.DateField()),
+                ('framework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_buckets', to='compliance_app.framework')),
+            ],
+            options={
+                'unique_together': {('framework', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_sizes(apps, schema_editor):
+    PageText = apps.get_model('compliance_app', 'PageText')
+    pages = []
+    for page in PageText.objects.order_by('digest').iterator(chunk_size=500):
+        page.size = sum(len(line) for line in page.lines)
+        pages.append(page)
+        if len(pages) >= 500:
+            PageText.objects.bulk_update(pages, ['size'])
+            pages = []
+    PageText.objects.bulk_update(pages, ['size'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0012_change_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagetext',
+            name='size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pagetext',
+            name='last_used_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_sizes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def backfill_change_stats(apps, schema_editor):
+    from compliance_app.change_stats import rebuild
+
+    rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0013_pagetext_lru'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_change_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def backfill_search_index(apps, schema_editor):
+    from compliance_app.search import rebuild_index
+
+    rebuild_index(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance_app', '0014_backfill_change_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
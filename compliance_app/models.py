@@ -1,5 +1,7 @@
 from django.db import models
 
+from .storage import policy_storage
+
 class Framework(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -10,6 +12,9 @@ class Framework(models.Model):
 class Policy(models.Model):
     framework = models.ForeignKey(Framework, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
+    latest_version = models.ForeignKey(
+        'PolicyVersion', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
 
     def __str__(self):
         return f"{self.title} ({self.framework.name})"
@@ -17,30 +22,160 @@ class Policy(models.Model):
 class PolicyVersion(models.Model):
     policy = models.ForeignKey(Policy, on_delete=models.CASCADE)
     version = models.CharField(max_length=50)
-    uploaded_file = models.FileField(upload_to='policies/')
+    uploaded_file = models.FileField(upload_to='policies/', storage=policy_storage)
     created_at = models.DateTimeField(auto_now_add=True)
     change_summary = models.JSONField(default=dict) 
+    render_key = models.CharField(max_length=64, blank=True)
+    page_digests = models.JSONField(default=list, blank=True)
+    # Rotated on every write to the version; drives ETags and response caches.
+    fingerprint = models.CharField(max_length=32, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['policy', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.policy.title} - {self.version}"
 
+class SectionBlob(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True)
+    content = models.TextField()
+
+    def __str__(self):
+        return self.digest
+
 class PolicySection(models.Model):
     version = models.ForeignKey(PolicyVersion, on_delete=models.CASCADE, related_name='sections')
     section_number = models.CharField(max_length=50)
-    content = models.TextField()
+    blob = models.ForeignKey(SectionBlob, on_delete=models.PROTECT, related_name='sections')
     archived = models.BooleanField(default=False)
+    parent = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children'
+    )
+    depth = models.PositiveSmallIntegerField(default=0)
+    sort_key = models.CharField(max_length=255, blank=True)
+    start_page = models.PositiveIntegerField(null=True, blank=True)
+    start_offset = models.PositiveIntegerField(null=True, blank=True)
+    end_page = models.PositiveIntegerField(null=True, blank=True)
+    end_offset = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         unique_together = ('version', 'section_number')
+        indexes = [
+            models.Index(fields=['version', 'archived', 'sort_key']),
+        ]
+
+    @property
+    def content(self):
+        return self.blob.content
 
     def __str__(self):
         return f"{self.version.policy.title} [{self.section_number}]"
 
+class PageText(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True)
+    lines = models.JSONField(default=list)
+    size = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.digest
+
 class PolicyDiff(models.Model):
     version = models.ForeignKey(PolicyVersion, on_delete=models.CASCADE, related_name='diffs')
     section_number = models.CharField(max_length=50)
     diff_text = models.TextField()
     change_details = models.JSONField(default=dict)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['version', 'section_number']),
+        ]
     
     def __str__(self):
-        return f"{self.version.policy.title} [{self.section_number}] changes"
\ No newline at end of file
+        return f"{self.version.policy.title} [{self.section_number}] changes"
+
+class IngestionJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    framework = models.ForeignKey(Framework, on_delete=models.CASCADE)
+    policy_title = models.CharField(max_length=255)
+    version = models.CharField(max_length=50)
+    source_file = models.FileField(upload_to='ingestion/', blank=True)
+    text_content = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)
+    policy_version = models.ForeignKey(PolicyVersion, on_delete=models.SET_NULL, null=True, blank=True)
+    change_summary = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.policy_title} - {self.version} [{self.status}]"
+
+class ExtractionCacheEntry(models.Model):
+    digest = models.CharField(max_length=64, unique=True)
+    sections = models.JSONField(default=dict)
+    outline = models.JSONField(default=dict)
+    size = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.digest
+
+class SearchPosting(models.Model):
+    term = models.CharField(max_length=64)
+    blob = models.ForeignKey(SectionBlob, on_delete=models.CASCADE, related_name='postings')
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('term', 'blob')
+
+    def __str__(self):
+        return f"{self.term} -> {self.blob_id}"
+
+class ChangeCounts(models.Model):
+    versions = models.IntegerField(default=0)
+    sections_added = models.IntegerField(default=0)
+    sections_modified = models.IntegerField(default=0)
+    sections_removed = models.IntegerField(default=0)
+    sections_moved = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+class FrameworkChangeStats(ChangeCounts):
+    framework = models.OneToOneField(
+        Framework, on_delete=models.CASCADE, primary_key=True, related_name='change_stats'
+    )
+
+    def __str__(self):
+        return f"{self.framework_id} change stats"
+
+class PolicyChangeStats(ChangeCounts):
+    policy = models.OneToOneField(
+        Policy, on_delete=models.CASCADE, primary_key=True, related_name='change_stats'
+    )
+
+    def __str__(self):
+        return f"{self.policy_id} change stats"
+
+class ChangeStatsBucket(ChangeCounts):
+    framework = models.ForeignKey(Framework, on_delete=models.CASCADE, related_name='change_buckets')
+    day = models.DateField()
+
+    class Meta:
+        unique_together = ('framework', 'day')
+
+    def __str__(self):
+        return f"{self.framework_id} {self.day}"
@@ -0,0 +1,69 @@
+from .models import PolicySection
+
+# Sections form a tree by their dotted numbers (4 > 4.2 > 4.2.1). Each row
+# stores a sort key with every component zero-padded to SORT_WIDTH digits,
+# so document order is plain string order and a section's subtree is the
+# single range [key, key + '/') on the (version, archived, sort_key) index:
+# '/' is the character right after '.', the component separator.
+
+SORT_WIDTH = 6
+
+
+def sort_key(section_number):
+    return '.'.join(part.zfill(SORT_WIDTH) for part in section_number.split('.'))
+
+
+def depth(section_number):
+    return section_number.count('.')
+
+
+def subtree_bounds(section_number):
+    key = sort_key(section_number)
+    return key, key + '/'
+
+
+def parent_number(section_number, numbers):
+    """The nearest ancestor of ``section_number`` present in ``numbers``."""
+    parts = section_number.split('.')
+    while len(parts) > 1:
+        parts.pop()
+        candidate = '.'.join(parts)
+        if candidate in numbers:
+            return candidate
+    return None
+
+
+def outline_fields(section_number, location=None):
+    start_page, start_offset, end_page, end_offset = location or (None, None, None, None)
+    return {
+        'sort_key': sort_key(section_number),
+        'depth': depth(section_number),
+        'start_page': start_page,
+        'start_offset': start_offset,
+        'end_page': end_page,
+        'end_offset': end_offset
+    }
+
+
+def link_parents(version_id):
+    """Point every live section of a version at its nearest live ancestor."""
+    rows = list(
+        PolicySection.objects.filter(version_id=version_id, archived=False)
+        .only('id', 'section_number', 'parent_id')
+    )
+    ids = {row.section_number: row.id for row in rows}
+    changed = []
+    for row in rows:
+        parent_id = ids.get(parent_number(row.section_number, ids))
+        if row.parent_id != parent_id:
+            row.parent_id = parent_id
+            changed.append(row)
+    if changed:
+        PolicySection.objects.bulk_update(changed, ['parent'])
+
+
+def subtree(version_id, section_number):
+    low, high = subtree_bounds(section_number)
+    return PolicySection.objects.filter(
+        version_id=version_id, archived=False, sort_key__gte=low, sort_key__lt=high
+    ).order_by('sort_key')
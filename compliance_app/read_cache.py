@@ -0,0 +1,178 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import Framework, PolicyDiff, PolicySection, PolicyVersion
+
+# Read-through cache for the mostly static data behind the framework list and
+# the editor: the framework list, version headers and the live section list
+# of each version, plus the serialized diff payload of each version and the
+# HTTP validators of each policy's history. Writers invalidate exactly the
+# keys they touch (create_framework, ingest_sections, generate_pdf), so
+# entries only expire by READ_CACHE_TIMEOUT as a safety net.
+
+FRAMEWORKS_KEY = 'compliance:frameworks'
+
+
+def _cache():
+    return caches[getattr(settings, 'READ_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'READ_CACHE_TIMEOUT', 300)
+
+
+def _header_key(version_id):
+    return f'compliance:version:{version_id}:header'
+
+
+def _sections_key(version_id):
+    return f'compliance:version:{version_id}:sections'
+
+
+def _diffs_key(version_id):
+    return f'compliance:version:{version_id}:diffs'
+
+
+def _history_key(policy_id):
+    return f'compliance:policy:{policy_id}:history'
+
+
+def _header_query(version_id):
+    return (
+        PolicyVersion.objects.select_related('policy')
+        .only('id', 'version', 'fingerprint', 'updated_at', 'policy__id', 'policy__title', 'policy__framework_id')
+        .filter(id=version_id)
+    )
+
+
+def _header(version_obj):
+    if version_obj is None:
+        return None
+    return {
+        'version_id': version_obj.id,
+        'version': version_obj.version,
+        'policy_id': version_obj.policy.id,
+        'policy_title': version_obj.policy.title,
+        'framework_id': version_obj.policy.framework_id,
+        'fingerprint': version_obj.fingerprint,
+        'updated_at': version_obj.updated_at
+    }
+
+
+def _diffs_query(version_id):
+    return PolicyDiff.objects.filter(version_id=version_id).values('section_number', 'diff_text')
+
+
+def _serialize(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+def _read_through(key, load):
+    cache = _cache()
+    value = cache.get(key)
+    if value is None:
+        value = load()
+        if value is not None:
+            cache.set(key, value, _timeout())
+    return value
+
+
+def frameworks():
+    return _read_through(FRAMEWORKS_KEY, lambda: list(Framework.objects.values('id', 'name')))
+
+
+def version_header(version_id):
+    """The version's ids, titles, ``fingerprint`` and ``updated_at``, or ``None``."""
+    return _read_through(_header_key(version_id), lambda: _header(_header_query(version_id).first()))
+
+
+def version_sections(version_id):
+    return _read_through(_sections_key(version_id), lambda: list(
+        PolicySection.objects.filter(version_id=version_id, archived=False)
+        .order_by('sort_key')
+        .values('section_number', content=F('blob__content'), hash=F('blob_id'))
+    ))
+
+
+def version_diffs_body(version_id, fingerprint):
+    """Serialized ``policy_diffs`` payload, reused while ``fingerprint`` holds."""
+    key = _diffs_key(version_id)
+    cached = _cache().get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+    body = _serialize(list(_diffs_query(version_id)))
+    _cache().set(key, (fingerprint, body), _timeout())
+    return body
+
+
+def history_validators(policy_id):
+    """``(etag, last_modified)`` for a policy's change history, or ``None``."""
+    def load():
+        rows = list(
+            PolicyVersion.objects.filter(policy_id=policy_id).order_by('id').values_list('id', 'fingerprint', 'updated_at')
+        )
+        if not rows:
+            return None
+        sha = hashlib.sha256()
+        for version_id, fingerprint, _ in rows:
+            sha.update(f'{version_id}:{fingerprint};'.encode('utf-8'))
+        return f'"{sha.hexdigest()[:32]}"', max(updated_at for _, _, updated_at in rows)
+    return _read_through(_history_key(policy_id), load)
+
+
+async def _aread_through(key, load):
+    cache = _cache()
+    value = await cache.aget(key)
+    if value is None:
+        value = await load()
+        if value is not None:
+            await cache.aset(key, value, _timeout())
+    return value
+
+
+async def aframeworks():
+    async def load():
+        return [framework async for framework in Framework.objects.values('id', 'name')]
+    return await _aread_through(FRAMEWORKS_KEY, load)
+
+
+async def aversion_header(version_id):
+    async def load():
+        return _header(await _header_query(version_id).afirst())
+    return await _aread_through(_header_key(version_id), load)
+
+
+async def aversion_sections(version_id):
+    async def load():
+        return [section async for section in (
+            PolicySection.objects.filter(version_id=version_id, archived=False)
+            .order_by('sort_key')
+            .values('section_number', content=F('blob__content'), hash=F('blob_id'))
+        )]
+    return await _aread_through(_sections_key(version_id), load)
+
+
+async def aversion_diffs_body(version_id, fingerprint):
+    key = _diffs_key(version_id)
+    cached = await _cache().aget(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+    body = _serialize([diff async for diff in _diffs_query(version_id)])
+    await _cache().aset(key, (fingerprint, body), _timeout())
+    return body
+
+
+def invalidate_frameworks():
+    _cache().delete(FRAMEWORKS_KEY)
+
+
+def invalidate_version(version_id, policy_id=None):
+    keys = [_header_key(version_id), _sections_key(version_id), _diffs_key(version_id)]
+    if policy_id is not None:
+        keys.append(_history_key(policy_id))
+    _cache().delete_many(keys)
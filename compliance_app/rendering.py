@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph
+
+from .metrics import counters, stage_duration
+from .models import PolicyVersion, PolicySection
+from .outline import sort_key
+from .workers import is_inline, process_pool, run_in_background
+
+logger = logging.getLogger(__name__)
+
+# Rendered editor PDFs are cached under renders/<key>.pdf, where the key
+# hashes the title, version label and sections in the form render_sections()
+# gives them. A save whose content was already rendered points the version at
+# the stored file; anything else is rendered in the process pool after the
+# request has returned. Renders no version points at are evicted least-
+# recently-used first once they exceed RENDER_CACHE_MAX_BYTES.
+
+
+def render_sections(sections):
+    """``[section_number, content]`` pairs as stored: stripped, in outline order."""
+    return sorted(
+        ([section_number, content.strip()] for section_number, content in sections),
+        key=lambda pair: sort_key(pair[0])
+    )
+
+
+def render_key(title, version, sections):
+    payload = json.dumps([title, version, sections], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_name(key):
+    return f'renders/{key}.pdf'
+
+
+def render_policy_pdf(title, version, sections):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph(version, styles['Heading1']))
+    story.append(Paragraph(title, styles['Heading2']))
+
+    for section_number, content in sections:
+        story.append(Paragraph(f"{section_number}", styles['Heading3']))
+        story.append(Paragraph(content, styles['Normal']))
+
+    doc.build(story)
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    return pdf_data
+
+
+def cached_render(key):
+    name = render_name(key)
+    if default_storage.exists(name):
+        counters.increment('render_cache_hits')
+        _touch(name)
+        return name
+    counters.increment('render_cache_misses')
+    return None
+
+
+def _touch(name):
+    try:
+        os.utime(default_storage.path(name))
+    except (NotImplementedError, OSError):
+        pass
+
+
+def evict_renders(keep=None):
+    max_bytes = getattr(settings, 'RENDER_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+    try:
+        _, files = default_storage.listdir('renders')
+    except FileNotFoundError:
+        return
+    referenced = set(
+        PolicyVersion.objects.filter(uploaded_file__startswith='renders/').values_list('uploaded_file', flat=True)
+    )
+    unreferenced = []
+    for filename in files:
+        name = f'renders/{filename}'
+        if name in referenced or name == keep:
+            continue
+        try:
+            unreferenced.append((default_storage.get_modified_time(name), default_storage.size(name), name))
+        except FileNotFoundError:
+            continue
+
+    excess = sum(size for _, size, _ in unreferenced) - max_bytes
+    for _, size, name in sorted(unreferenced):
+        if excess <= 0:
+            break
+        default_storage.delete(name)
+        counters.increment('render_evictions')
+        excess -= size
+
+
+def schedule_render(version_id, key, title, version, sections):
+    return run_in_background(_render_job, version_id, key, title, version, sections)
+
+
+# Incremental editor saves do not render on every request: request_render()
+# restarts a per-version timer, and the PDF is rendered from the stored
+# sections once RENDER_COALESCE_SECONDS pass without another save of that
+# version, so a burst of autosaves costs a single render.
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def request_render(version_id):
+    delay = getattr(settings, 'RENDER_COALESCE_SECONDS', 2.0)
+    if is_inline() or delay <= 0:
+        return run_in_background(render_current, version_id)
+    timer = threading.Timer(delay, _fire_render, args=(version_id,))
+    timer.daemon = True
+    with _pending_lock:
+        previous = _pending.get(version_id)
+        if previous is not None:
+            previous.cancel()
+            counters.increment('renders_coalesced')
+        _pending[version_id] = timer
+    timer.start()
+
+
+def _fire_render(version_id):
+    with _pending_lock:
+        if _pending.get(version_id) is not threading.current_thread():
+            return
+        del _pending[version_id]
+    run_in_background(render_current, version_id)
+
+
+def render_current(version_id):
+    """Attach a render of the current live sections of ``version_id``."""
+    version_obj = PolicyVersion.objects.select_related('policy').filter(id=version_id).first()
+    if version_obj is None:
+        return
+    title, version = version_obj.policy.title, version_obj.version
+    sections = render_sections(
+        PolicySection.objects.filter(version_id=version_id, archived=False)
+        .values_list('section_number', 'blob__content')
+    )
+    key = render_key(title, version, sections)
+    PolicyVersion.objects.filter(id=version_id).update(render_key=key)
+    cached_name = cached_render(key)
+    if cached_name:
+        PolicyVersion.objects.filter(id=version_id, render_key=key).update(uploaded_file=cached_name)
+        return
+    _render_job(version_id, key, title, version, sections)
+
+
+def _render_job(version_id, key, title, version, sections):
+    name = render_name(key)
+    if not default_storage.exists(name):
+        start = time.perf_counter()
+        try:
+            pdf_data = process_pool().submit(render_policy_pdf, title, version, sections).result()
+        except Exception:
+            counters.increment('render_failures')
+            logger.exception("Rendering %s v%s failed", title, version)
+            return
+        elapsed = time.perf_counter() - start
+        counters.increment('renders')
+        counters.increment('render_seconds', elapsed)
+        stage_duration.observe(elapsed, 'background', 'pdf_render')
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(pdf_data))
+
+    # A newer save may have changed the content meanwhile; only attach the
+    # file if the version still expects this render.
+    PolicyVersion.objects.filter(id=version_id, render_key=key).update(uploaded_file=name)
+    evict_renders(keep=name)
+
+
+def stats():
+    snapshot = counters.snapshot()
+    renders = snapshot.get('renders', 0)
+    return {
+        'hits': snapshot.get('render_cache_hits', 0),
+        'misses': snapshot.get('render_cache_misses', 0),
+        'renders': renders,
+        'coalesced': snapshot.get('renders_coalesced', 0),
+        'failures': snapshot.get('render_failures', 0),
+        'evictions': snapshot.get('render_evictions', 0),
+        'render_seconds_total': round(snapshot.get('render_seconds', 0), 6),
+        'render_seconds_avg': round(snapshot.get('render_seconds', 0) / renders, 6) if renders else None
+    }
@@ -0,0 +1,134 @@
+import math
+import re
+
+from django.apps import apps as global_apps
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+
+from .models import PolicySection, SearchPosting, SectionBlob
+
+# Inverted index over SectionBlob content. Blobs are immutable and shared by
+# every version that contains the same section text, so each distinct text is
+# tokenized once, when ensure_blobs() first stores it. Ranking is TF-IDF with
+# a saturating term frequency; all terms of the query must match.
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has in is it of on or that the this to was were will with'.split()
+)
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text):
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token not in STOP_WORDS and len(token) <= MAX_TERM_LENGTH:
+            yield token
+
+
+def term_frequencies(text):
+    frequencies = {}
+    for token in tokenize(text):
+        frequencies[token] = frequencies.get(token, 0) + 1
+    return frequencies
+
+
+def index_blobs(contents, posting_model=SearchPosting):
+    """Add postings for ``{digest: content}`` blobs that were just stored."""
+    postings = [
+        posting_model(term=term, blob_id=digest, frequency=frequency)
+        for digest, content in contents.items()
+        for term, frequency in term_frequencies(content).items()
+    ]
+    posting_model.objects.bulk_create(postings, batch_size=1000, ignore_conflicts=True)
+
+
+def rebuild_index(batch_size=500, apps=global_apps):
+    """Re-index every stored blob from scratch. Returns the number indexed.
+
+    Migrations pass their historical ``apps``.
+    """
+    posting_model = apps.get_model('compliance_app', 'SearchPosting')
+    blob_model = apps.get_model('compliance_app', 'SectionBlob')
+    posting_model.objects.all().delete()
+    batch = {}
+    indexed = 0
+    for digest, content in blob_model.objects.values_list('digest', 'content').iterator(chunk_size=batch_size):
+        batch[digest] = content
+        if len(batch) >= batch_size:
+            index_blobs(batch, posting_model)
+            indexed += len(batch)
+            batch = {}
+    index_blobs(batch, posting_model)
+    return indexed + len(batch)
+
+
+def search_sections(query, framework_id=None, latest_only=False, include_archived=False, offset=0, limit=20):
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return 0, []
+
+    document_frequency = dict(
+        SearchPosting.objects.filter(term__in=terms).values('term').annotate(n=Count('id')).values_list('term', 'n')
+    )
+    if len(document_frequency) < len(terms):
+        return 0, []
+    total_documents = SectionBlob.objects.count()
+    idf = {term: math.log(1 + total_documents / document_frequency[term]) for term in terms}
+
+    frequency = Cast('blob__postings__frequency', FloatField())
+    weight = Case(
+        *[When(blob__postings__term=term, then=Value(idf[term])) for term in terms],
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+
+    sections = PolicySection.objects.filter(blob__postings__term__in=terms)
+    if not include_archived:
+        sections = sections.filter(archived=False)
+    if framework_id:
+        sections = sections.filter(version__policy__framework_id=framework_id)
+    if latest_only:
+        sections = sections.filter(version_id=F('version__policy__latest_version_id'))
+
+    matches = (
+        sections
+        .values('id')
+        .annotate(
+            matched_terms=Count('blob__postings__term', distinct=True),
+            score=Sum(weight * frequency / (frequency + Value(1.2)))
+        )
+        .filter(matched_terms=len(terms))
+    )
+    total = matches.count()
+    page = list(matches.order_by('-score', 'id')[offset:offset + limit])
+
+    rows = {
+        s.id: s for s in PolicySection.objects.filter(id__in=[m['id'] for m in page])
+        .select_related('blob', 'version__policy__framework')
+    }
+    results = []
+    for match in page:
+        section = rows[match['id']]
+        results.append({
+            'section_id': section.id,
+            'section_number': section.section_number,
+            'version_id': section.version_id,
+            'version': section.version.version,
+            'policy_id': section.version.policy_id,
+            'policy_title': section.version.policy.title,
+            'framework_id': section.version.policy.framework_id,
+            'framework': section.version.policy.framework.name,
+            'latest': section.version_id == section.version.policy.latest_version_id,
+            'archived': section.archived,
+            'score': round(match['score'], 6),
+            'snippet': snippet(section.content, terms)
+        })
+    return total, results
+
+
+def snippet(content, terms, width=160):
+    lowered = content.lower()
+    positions = [lowered.find(term) for term in terms if lowered.find(term) >= 0]
+    start = max(min(positions) - width // 4, 0) if positions else 0
+    text = content[start:start + width].replace('\n', ' ')
+    return ('...' if start else '') + text + ('...' if start + width < len(content) else '')
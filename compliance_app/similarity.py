@@ -0,0 +1,108 @@
+import hashlib
+import re
+from collections import defaultdict
+
+from django.conf import settings
+
+# Pairs removed and added sections whose content is similar, so renumbered
+# sections are reported as moves instead of a removal plus an addition.
+# Each section is reduced to word shingles and a MinHash signature; LSH
+# banding only compares sections that share a band bucket, which keeps the
+# matching near-linear in the number of sections. Candidates are then scored
+# by the exact Jaccard similarity of their shingle sets.
+#
+# Signatures use one-permutation hashing: every shingle is hashed once and
+# the hash space is split into NUM_BINS bins, keeping the minimum per bin.
+# Empty bins borrow from the next filled bin (rotation densification), so a
+# signature costs one hash per shingle instead of one per permutation.
+
+SHINGLE_SIZE = 3
+NUM_BINS = 64
+BANDS = 16
+ROWS = NUM_BINS // BANDS
+BIN_BITS = 6
+ROTATION_OFFSET = 1 << 58
+
+word_pattern = re.compile(r'\w+')
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = word_pattern.findall(text.lower())
+    if len(words) < size:
+        return {_hash(' '.join(words))} if words else set()
+    return {_hash(' '.join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def minhash(shingle_set):
+    bins = [None] * NUM_BINS
+    for value in shingle_set:
+        index = value & (NUM_BINS - 1)
+        value >>= BIN_BITS
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    if None in bins:
+        for index in range(NUM_BINS):
+            distance = 1
+            while bins[index] is None:
+                borrowed = bins[(index + distance) % NUM_BINS]
+                if borrowed is not None and borrowed < ROTATION_OFFSET:
+                    bins[index] = borrowed + distance * ROTATION_OFFSET
+                distance += 1
+    return bins
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def match_moves(removed, added, threshold=None):
+    """Pair ``removed`` and ``added`` sections (``{number: content}``) by content.
+
+    Returns ``[(old_number, new_number, similarity)]`` with each section used
+    at most once, best matches first, keeping pairs at or above
+    ``threshold`` (MOVE_SIMILARITY_THRESHOLD by default).
+    """
+    if not removed or not added:
+        return []
+    if threshold is None:
+        threshold = getattr(settings, 'MOVE_SIMILARITY_THRESHOLD', 0.5)
+
+    old_shingles = {number: shingles(content) for number, content in removed.items()}
+    buckets = defaultdict(list)
+    for number, shingle_set in old_shingles.items():
+        if not shingle_set:
+            continue
+        signature = minhash(shingle_set)
+        for band in range(BANDS):
+            buckets[band, tuple(signature[band * ROWS:(band + 1) * ROWS])].append(number)
+
+    scored = []
+    for new_number, content in added.items():
+        new_shingles = shingles(content)
+        if not new_shingles:
+            continue
+        signature = minhash(new_shingles)
+        candidates = set()
+        for band in range(BANDS):
+            candidates.update(buckets.get((band, tuple(signature[band * ROWS:(band + 1) * ROWS])), ()))
+        for old_number in candidates:
+            score = jaccard(old_shingles[old_number], new_shingles)
+            if score >= threshold:
+                scored.append((score, old_number, new_number))
+
+    pairs = []
+    used_old = set()
+    used_new = set()
+    for score, old_number, new_number in sorted(scored, key=lambda item: (-item[0], item[1], item[2])):
+        if old_number in used_old or new_number in used_new:
+            continue
+        used_old.add(old_number)
+        used_new.add(new_number)
+        pairs.append((old_number, new_number, round(score, 4)))
+    return pairs
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+from .metrics import counters
+
+# Policy PDFs are stored under their SHA-256: ``policies/ab/abcd....pdf``.
+# Saving a file whose bytes are already stored just returns the existing
+# name, so identical uploads and editor saves share one file on disk. Files
+# are never rewritten in place, which also makes the digest a strong ETag.
+
+CONTENT_NAME = re.compile(r'(?:^|/)[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?:\.[A-Za-z0-9]+)?$')
+
+
+def content_digest(name):
+    """The SHA-256 embedded in a content-addressed name, or ``None``."""
+    match = CONTENT_NAME.search(name or '')
+    return match.group('digest') if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        sha = hashlib.sha256()
+        for chunk in content.chunks():
+            sha.update(chunk)
+        content.seek(0)
+        digest = sha.hexdigest()
+
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(directory, digest[:2], digest + extension).replace('\\', '/')
+        return super().save(name, content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # The same name always means the same bytes.
+        return name
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            counters.increment('storage_dedup_hits')
+            return name
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks():
+                    out.write(chunk)
+            os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+            # Concurrent writers of the same content race harmlessly here.
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        counters.increment('storage_writes')
+        return name
+
+
+policy_file_storage = ContentAddressedStorage()
+
+
+def policy_storage():
+    return policy_file_storage
@@ -0,0 +1,94 @@
+from .models import PolicyDiff, SectionBlob
+
+# change_summary / PolicyDiff.change_details format. Sections are referenced
+# by their SectionBlob digest and the diff text lives only in
+# PolicyDiff.diff_text; expand_change_summary() rebuilds the full old/new
+# content and diff for clients that ask for it.
+SUMMARY_FORMAT = 2
+
+
+def diff_line_stats(diff):
+    added = removed = 0
+    for line in diff.splitlines()[2:]:
+        if line.startswith('+'):
+            added += 1
+        elif line.startswith('-'):
+            removed += 1
+    return added, removed
+
+
+def compact_change(section, change_type, old_hash, new_hash, diff, from_section=None):
+    """One ``changes`` entry; moves also carry the old ``from_section``."""
+    lines_added, lines_removed = diff_line_stats(diff)
+    change = {
+        'section': section,
+        'type': change_type,
+        'old_hash': old_hash,
+        'new_hash': new_hash,
+        'lines_added': lines_added,
+        'lines_removed': lines_removed
+    }
+    if from_section is not None:
+        change['from_section'] = from_section
+    return change
+
+
+def summary_stats(changes, deprecations, total_sections):
+    return {
+        'sections_added': len([c for c in changes if c['type'] == 'added']),
+        'sections_modified': len([c for c in changes if c['type'] == 'modified']),
+        'sections_removed': len(deprecations),
+        'sections_moved': len([c for c in changes if 'from_section' in c]),
+        'total_sections': total_sections
+    }
+
+
+def compact_details(change, timestamp):
+    details = {
+        'change_type': change['type'],
+        'old_hash': change['old_hash'],
+        'new_hash': change['new_hash'],
+        'timestamp': timestamp
+    }
+    if 'from_section' in change:
+        details['from_section'] = change['from_section']
+    return details
+
+
+def expand_change_summary(summary, version_id):
+    """Return ``summary`` with old/new content and diffs filled back in."""
+    if summary.get('format') != SUMMARY_FORMAT:
+        return summary
+
+    changes = summary.get('changes', [])
+    deprecations = summary.get('deprecations', [])
+    hashes = {c['old_hash'] for c in changes} | {c['new_hash'] for c in changes}
+    hashes |= {d['old_hash'] for d in deprecations}
+    hashes.discard(None)
+
+    contents = dict(SectionBlob.objects.filter(digest__in=hashes).values_list('digest', 'content'))
+    diffs = {}
+    if changes:
+        diffs = dict(
+            PolicyDiff.objects
+            .filter(version_id=version_id, section_number__in=[c['section'] for c in changes])
+            .order_by('id')
+            .values_list('section_number', 'diff_text')
+        )
+
+    return {
+        **summary,
+        'changes': [
+            {
+                **c,
+                'old_content': contents.get(c['old_hash'], ''),
+                'new_content': contents.get(c['new_hash'], ''),
+                'diff': diffs.get(c['section'], '')
+            }
+            for c in changes
+        ],
+        'deprecations': [
+            {**d, 'content': contents.get(d['old_hash'], '')}
+            for d in deprecations
+        ]
+    }
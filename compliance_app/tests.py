@@ -1,3 +1,1135 @@
-from django.test import TestCase
+import asyncio
+import base64
+import difflib
+import io
+import json
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import async_views, change_stats, extraction_cache, read_cache, rendering, workers
+from .benchmarks import sections_to_pdf
+from .diffing import DifflibEngine, MyersEngine, PatienceEngine
+from .editing import apply_section_edits, parse_edits
+from .ingestion import content_digest, ingest_sections, parse_document
+from .models import (
+    ChangeStatsBucket, Framework, FrameworkChangeStats, IngestionJob, PageText, Policy, PolicyChangeStats,
+    PolicyDiff, PolicySection, PolicyVersion, SearchPosting
+)
+from .search import rebuild_index
+from .similarity import jaccard, match_moves, shingles
+from .summaries import expand_change_summary
+
+
+@override_settings(WORKER_MODE='process')
+class AsyncViewLoadTests(TransactionTestCase):
+    """Async reads are answered while large uploads are still running.
+
+    Latency under load is measured by ``manage.py bench_async_reads``.
+    """
+
+    uploads = 3
+    sections_per_upload = 600
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def tearDown(self):
+        workers.shutdown()
+
+    def large_pdf(self, seed):
+        sections = {
+            str(i): f'Policy {seed} clause {i}: access to systems holding regulated data is reviewed.'
+            for i in range(1, self.sections_per_upload + 1)
+        }
+        return sections_to_pdf(f'Policy {seed}', sections)
+
+    async def upload(self, framework, seed, pdf):
+        request = self.factory.post('/api/upload_policy_pdf/', {
+            'framework_id': framework.id,
+            'policy_title': f'Policy {seed}',
+            'version': '1',
+            'uploaded_file': SimpleUploadedFile(f'policy-{seed}.pdf', pdf, 'application/pdf')
+        })
+        return await async_views.upload_policy_pdf(request)
+
+    async def test_reads_complete_while_uploads_are_pending(self):
+        framework = await Framework.objects.acreate(name='ISO 27001', description='')
+        pdfs = [self.large_pdf(seed) for seed in range(self.uploads)]
+
+        tasks = [asyncio.create_task(self.upload(framework, seed, pdf)) for seed, pdf in enumerate(pdfs)]
+        reads_while_pending = 0
+        while not all(task.done() for task in tasks):
+            response = await async_views.get_frameworks(self.factory.get('/api/frameworks/'))
+            self.assertEqual(response.status_code, 200)
+            if not all(task.done() for task in tasks):
+                reads_while_pending += 1
+            await asyncio.sleep(0.005)
+        responses = await asyncio.gather(*tasks)
+
+        self.assertGreater(reads_while_pending, 0)
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                json.loads(response.content)['changes']['stats']['total_sections'], self.sections_per_upload
+            )
+
+
+class PolicyLockStressTests(TransactionTestCase):
+    """Concurrent uploads of the same policy stay consistent.
+
+    Whether different policies ingest in parallel is a throughput question,
+    answered by ``manage.py bench_policy_locks``.
+    """
+
+    policies = 4
+    versions = 3
+    copies = 2
+    sections = 40
+    threads = 8
+
+    def policy_sections(self, policy, version):
+        return {
+            str(i): f'Policy {policy} clause {i}, revision {version if i % 5 == 0 else 0}.'
+            for i in range(1, self.sections + 1)
+        }
+
+    def upload(self, framework, policy, version):
+        try:
+            ingest_sections(framework, f'Policy {policy}', str(version), self.policy_sections(policy, version))
+        finally:
+            connection.close()
+
+    def assertNoDuplicates(self, queryset, *fields):
+        duplicates = queryset.values(*fields).annotate(n=Count('id')).filter(n__gt=1)
+        self.assertEqual(list(duplicates), [])
+
+    def test_concurrent_uploads_produce_no_duplicate_diffs(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        # Every version of every policy is uploaded ``copies`` times, all at
+        # once, so uploads of one policy keep racing each other.
+        uploads = [
+            (policy, version)
+            for version in range(1, self.versions + 1)
+            for _ in range(self.copies)
+            for policy in range(self.policies)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            list(pool.map(lambda upload: self.upload(framework, *upload), uploads))
+
+        self.assertEqual(Policy.objects.filter(framework=framework).count(), self.policies)
+        self.assertNoDuplicates(PolicyVersion.objects.all(), 'policy', 'version')
+        self.assertEqual(PolicyVersion.objects.count(), self.policies * self.versions)
+        self.assertNoDuplicates(PolicySection.objects.all(), 'version', 'section_number')
+        self.assertNoDuplicates(PolicyDiff.objects.all(), 'version', 'section_number')
+        for version in PolicyVersion.objects.all():
+            self.assertEqual(version.sections.filter(archived=False).count(), self.sections)
+            self.assertEqual(version.change_summary['stats']['total_sections'], self.sections)
+        for policy in Policy.objects.all():
+            self.assertIsNotNone(policy.latest_version_id)
+
+
+class ReuploadTests(TestCase):
+    """Re-uploading a version is measured against the previous version."""
+
+    def setUp(self):
+        self.framework = Framework.objects.create(name='ISO 27001', description='')
+        ingest_sections(self.framework, 'Access', '1', {'1': 'Scope.', '2': 'Passwords rotate yearly.'})
+
+    def upload_v2(self, second):
+        version, summary = ingest_sections(self.framework, 'Access', '2', {'1': 'Scope.', '2': second})
+        return version, summary['stats']
+
+    def test_identical_retry_keeps_the_summary(self):
+        version, first = self.upload_v2('Passwords rotate quarterly.')
+        _, retry = self.upload_v2('Passwords rotate quarterly.')
+
+        self.assertEqual(first['sections_modified'], 1)
+        self.assertEqual(retry, first)
+        version.refresh_from_db()
+        self.assertEqual(version.change_summary['stats']['sections_modified'], 1)
+        self.assertEqual(FrameworkChangeStats.objects.get(framework=self.framework).sections_modified, 1)
+        self.assertEqual(PolicyDiff.objects.filter(version=version).count(), 1)
+
+    def test_changed_reupload_replaces_the_diff(self):
+        version, _ = self.upload_v2('Passwords rotate quarterly.')
+        self.upload_v2('Passwords rotate monthly.')
+
+        diffs = list(PolicyDiff.objects.filter(version=version).values_list('section_number', 'diff_text'))
+        self.assertEqual(len(diffs), 1)
+        self.assertIn('+Passwords rotate monthly.', diffs[0][1])
+
+
+class LatestVersionTests(TestCase):
+    """The ``latest_version`` pointer only moves when a new version is created."""
+
+    def test_reuploads_keep_the_pointer(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        v1, _ = ingest_sections(framework, 'Access', '1', {'1': 'Passwords rotate yearly.'})
+        v2, _ = ingest_sections(framework, 'Access', '2', {'1': 'Passwords rotate quarterly.'})
+        policy = Policy.objects.get(id=v1.policy_id)
+        self.assertEqual(policy.latest_version_id, v2.id)
+
+        # Re-uploading the latest version still diffs against the one before it.
+        _, summary = ingest_sections(framework, 'Access', '2', {'1': 'Passwords rotate monthly.'})
+        self.assertEqual(summary['changes'][0]['type'], 'modified')
+        self.assertIn('-Passwords rotate yearly.', PolicyDiff.objects.get(version=v2).diff_text)
+
+        ingest_sections(framework, 'Access', '1', {'1': 'Passwords rotate weekly.'})
+        policy.refresh_from_db()
+        self.assertEqual(policy.latest_version_id, v2.id)
+
+        v3, _ = ingest_sections(framework, 'Access', '3', {'1': 'Passwords rotate daily.'})
+        policy.refresh_from_db()
+        self.assertEqual(policy.latest_version_id, v3.id)
+
+
+class CompareCacheTests(TestCase):
+    """Cached comparisons follow the versions' fingerprints."""
+
+    def test_rewritten_version_is_compared_again(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        v1, _ = ingest_sections(framework, 'Access', '1', {'1': 'Passwords rotate yearly.'})
+        v2, _ = ingest_sections(framework, 'Access', '2', {'1': 'Passwords rotate quarterly.'})
+        url = f'/api/policies/{v1.policy_id}/compare/{v1.id}/{v2.id}/'
+
+        self.assertIn('+Passwords rotate quarterly.', self.client.get(url).json()['changes'][0]['diff'])
+        # Another worker rewrites v2: nothing is evicted here, only the fingerprint moves.
+        ingest_sections(framework, 'Access', '2', {'1': 'Passwords rotate monthly.'})
+        self.assertIn('+Passwords rotate monthly.', self.client.get(url).json()['changes'][0]['diff'])
+
+
+class PageTextCacheTests(TestCase):
+    """The page text cache stays under its byte limit."""
+
+    @override_settings(PAGE_TEXT_CACHE_MAX_BYTES=100)
+    def test_least_recently_used_pages_are_evicted(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        page = ['x' * 40]
+
+        def upload(version, pages, extracted):
+            outline = {'pages': pages, 'locations': {}, 'lines': len(pages)}
+            ingest_sections(framework, 'Access', version, {'1': f'Scope {version}.'}, None, outline,
+                            {digest: page for digest in extracted})
+
+        upload('1', ['a', 'b'], ['a', 'b'])
+        upload('2', ['b', 'c'], ['c'])
+
+        self.assertEqual(set(PageText.objects.values_list('digest', flat=True)), {'b', 'c'})
+        self.assertEqual(PageText.objects.get(digest='c').size, 40)
+
+    def test_extracted_pages_are_spooled_not_buffered(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        pages = [('a', ['1', 'Scope.'], True), ('b', ['2', 'Passwords.'], False), ('c', ['Rotate.'], True)]
+        sections, outline, spool = parse_document(iter(pages))
+        # What a process-pool worker returns: the receiving copy owns the file.
+        received = pickle.loads(pickle.dumps(spool))
+        path = received.path
+        del spool
+        self.assertEqual(dict(received.items()), {'a': ['1', 'Scope.'], 'c': ['Rotate.']})
+
+        ingest_sections(framework, 'Access', '1', sections, None, outline, received)
+
+        self.assertEqual(set(PageText.objects.values_list('digest', flat=True)), {'a', 'c'})
+        self.assertFalse(os.path.exists(path))
+
+
+class DiffEngineTests(SimpleTestCase):
+    """Every engine's opcodes describe ``b`` exactly; difflib matches the stdlib."""
+
+    CASES = [
+        ([], []),
+        ([], ['a', 'b']),
+        (['a', 'b'], []),
+        (['a', 'b', 'c'], ['a', 'b', 'c']),
+        (['a', 'a', 'b', 'a'], ['a', 'b', 'a', 'a']),
+        (['x', 'x', 'x'], ['x', 'x']),
+        (['}', '', '}', '', '}'], ['}', 'new', '}', '']),
+        ([str(i) for i in range(20)], [str(i) for i in range(20) if i % 7] + ['end']),
+    ]
+
+    def cases(self):
+        rng = random.Random(7)
+        yield from self.CASES
+        for _ in range(50):
+            a = [rng.choice('abcde') for _ in range(rng.randint(0, 30))]
+            b = [rng.choice('abcde') for _ in range(rng.randint(0, 30))]
+            yield a, b
+
+    def test_difflib_engine_matches_difflib(self):
+        engine = DifflibEngine()
+        for a, b in self.cases():
+            expected = '\n'.join(difflib.unified_diff(a, b, 'old', 'new', lineterm=''))
+            self.assertEqual(engine.unified_diff(a, b, 'old', 'new'), expected, (a, b))
+
+    def test_opcodes_rebuild_b(self):
+        for engine in (MyersEngine(), PatienceEngine()):
+            for a, b in self.cases():
+                rebuilt = []
+                i = j = 0
+                for tag, i1, i2, j1, j2 in engine.opcodes(a, b):
+                    self.assertEqual((i1, j1), (i, j), (engine.name, a, b))
+                    if tag == 'equal':
+                        self.assertEqual(a[i1:i2], b[j1:j2], (engine.name, a, b))
+                    rebuilt.extend(b[j1:j2])
+                    i, j = i2, j2
+                self.assertEqual((i, j), (len(a), len(b)), (engine.name, a, b))
+                self.assertEqual(rebuilt, b, (engine.name, a, b))
+
+    def test_rewritten_large_section_is_cheap(self):
+        a = [f'Old clause {i}: access is reviewed yearly.' for i in range(3000)]
+        b = [f'New clause {i}: access is reviewed quarterly.' for i in range(3000)]
+        for engine in (MyersEngine(), PatienceEngine()):
+            tracemalloc.start()
+            start = time.perf_counter()
+            diff = engine.unified_diff(a, b, 'old', 'new')
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.assertEqual(diff.count('\n-'), 3000)
+            self.assertEqual(diff.count('\n+') - 1, 3000)
+            self.assertLess(elapsed, 2, engine.name)
+            self.assertLess(peak, 50 * 1024 * 1024, engine.name)
+
+
+class SectionSaveTests(TestCase):
+    """Incremental saves through /api/policy_versions/<id>/sections/."""
+
+    def setUp(self):
+        self.framework = Framework.objects.create(name='ISO 27001', description='')
+        ingest_sections(self.framework, 'Access', '1', {'1': 'Scope.', '2': 'Rotate yearly.', '3': 'Audit.'})
+        self.version, _ = ingest_sections(
+            self.framework, 'Access', '2', {'1': 'Scope.', '2': 'Rotate quarterly.', '3': 'Audit.'}
+        )
+
+    def live_hash(self, version, section_number):
+        return PolicySection.objects.get(version=version, section_number=section_number, archived=False).blob_id
+
+    def save(self, version, *sections):
+        items = [
+            {'section_number': num, 'base_hash': base_hash, 'content': content}
+            for num, base_hash, content in sections
+        ]
+        return self.client.post(
+            f'/api/policy_versions/{version.id}/sections/',
+            json.dumps({'sections': items}),
+            content_type='application/json'
+        )
+
+    def test_stale_base_hash_is_a_conflict_and_writes_nothing(self):
+        fingerprint = self.version.fingerprint
+        stale = content_digest('Rotate yearly.')
+        response = self.save(
+            self.version,
+            ('2', stale, 'Rotate monthly.'),
+            ('3', self.live_hash(self.version, '3'), 'Audit twice.')
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicts'], [
+            {'section': '2', 'base_hash': stale, 'current_hash': content_digest('Rotate quarterly.')}
+        ])
+        self.version.refresh_from_db()
+        self.assertEqual(self.version.fingerprint, fingerprint)
+        self.assertEqual(self.live_hash(self.version, '3'), content_digest('Audit.'))
+
+    def test_edit_replaces_the_diff_and_summary_entry(self):
+        response = self.save(self.version, ('2', self.live_hash(self.version, '2'), 'Rotate monthly.'))
+        self.assertEqual(response.status_code, 200)
+
+        diffs = list(PolicyDiff.objects.filter(version=self.version).values_list('section_number', 'diff_text'))
+        self.assertEqual(len(diffs), 1)
+        self.assertEqual(diffs[0][0], '2')
+        self.assertIn('-Rotate yearly.', diffs[0][1])
+        self.assertIn('+Rotate monthly.', diffs[0][1])
+        self.version.refresh_from_db()
+        summary = self.version.change_summary
+        self.assertEqual([(c['section'], c['new_hash']) for c in summary['changes']],
+                         [('2', content_digest('Rotate monthly.'))])
+        self.assertEqual(summary['stats']['sections_modified'], 1)
+
+        # Back to the previous version's text: no longer a change.
+        self.save(self.version, ('2', self.live_hash(self.version, '2'), 'Rotate yearly.'))
+        self.version.refresh_from_db()
+        self.assertFalse(PolicyDiff.objects.filter(version=self.version).exists())
+        self.assertEqual(self.version.change_summary['changes'], [])
+
+    def test_null_content_removes_the_section(self):
+        response = self.save(self.version, ('3', self.live_hash(self.version, '3'), None))
+
+        self.assertEqual(response.json()['sections'], {'3': None})
+        live = PolicySection.objects.filter(version=self.version, archived=False)
+        self.assertFalse(live.filter(section_number='3').exists())
+        self.version.refresh_from_db()
+        summary = self.version.change_summary
+        self.assertEqual([d['section'] for d in summary['deprecations']], ['3'])
+        self.assertEqual(summary['stats']['sections_removed'], 1)
+        self.assertEqual(
+            PolicyDiff.objects.get(version=self.version, section_number='3').diff_text, 'Section 3 was removed'
+        )
+
+    def test_query_count_does_not_grow_with_the_policy(self):
+        clauses = {str(n): f'Clause {n}.' for n in range(1, 201)}
+        ingest_sections(self.framework, 'Large', '1', clauses)
+        large, _ = ingest_sections(self.framework, 'Large', '2', {**clauses, '2': 'Clause 2, revised.'})
+
+        small = self.save(self.version, ('1', self.live_hash(self.version, '1'), 'New scope.')).json()
+        big = self.save(large, ('1', self.live_hash(large, '1'), 'New clause 1.')).json()
+
+        self.assertEqual(big['query_count'], small['query_count'])
+        self.assertLessEqual(big['query_count'], 20)
+
+
+class DownloadTests(TestCase):
+    """Range and conditional requests against download_policy_version."""
+
+    data = bytes(range(256)) * 4
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        version, _ = ingest_sections(
+            framework, 'Access', '1', {'1': 'Scope.'}, SimpleUploadedFile('access.pdf', self.data)
+        )
+        self.url = f'/api/policy_versions/{version.id}/download/'
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers=headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_download(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.body(response), self.data)
+
+    def test_byte_range(self):
+        response = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.body(response), self.data[10:20])
+
+    def test_suffix_range(self):
+        response = self.get(Range='bytes=-100')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 924-1023/1024')
+        self.assertEqual(self.body(response), self.data[-100:])
+
+        response = self.get(Range='bytes=-5000')
+        self.assertEqual(response['Content-Range'], 'bytes 0-1023/1024')
+        self.assertEqual(self.body(response), self.data)
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        response = self.get(Range='bytes=0-9', **{'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.data)
+
+        response = self.get(Range='bytes=0-9', **{'If-Range': etag})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), self.data[:10])
+
+    def test_if_none_match(self):
+        etag = self.get()['ETag']
+        response = self.get(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+
+class ChangeStatsTests(TestCase):
+    """Incrementally maintained change stats match a rebuild from history."""
+
+    def snapshot(self):
+        fields = ('versions',) + change_stats.STAT_FIELDS
+        return (
+            sorted(FrameworkChangeStats.objects.values_list('framework_id', *fields)),
+            sorted(PolicyChangeStats.objects.values_list('policy_id', *fields)),
+            sorted(ChangeStatsBucket.objects.values_list('framework_id', 'day', *fields)),
+        )
+
+    def test_incremental_totals_equal_rebuild(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        ingest_sections(framework, 'Access', '1', {'1': 'Scope.', '2': 'Rotate yearly.', '3': 'Audit.'})
+        version, _ = ingest_sections(framework, 'Access', '2', {'1': 'Scope.', '2': 'Rotate quarterly.'})
+        ingest_sections(framework, 'Logging', '1', {'1': 'Keep logs.'})
+
+        live = PolicySection.objects.get(version=version, section_number='1', archived=False).blob_id
+        apply_section_edits(version.id, parse_edits([
+            {'section_number': '1', 'base_hash': live, 'content': 'Scope, revised.'},
+            {'section_number': '4', 'base_hash': None, 'content': 'Exceptions.'}
+        ]))
+        ingest_sections(framework, 'Access', '2', {'1': 'Scope.', '2': 'Rotate monthly.', '3': 'Audit.'})
+
+        incremental = self.snapshot()
+        self.assertEqual(FrameworkChangeStats.objects.get(framework=framework).versions, 3)
+        change_stats.rebuild()
+        self.assertEqual(self.snapshot(), incremental)
+
+
+class SearchTests(TestCase):
+    """Full-text search over section blobs through /api/search/."""
+
+    def setUp(self):
+        self.iso = Framework.objects.create(name='ISO 27001', description='')
+        self.soc = Framework.objects.create(name='SOC 2', description='')
+
+    def search(self, q, **params):
+        response = self.client.get('/api/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_rarer_terms_weigh_more(self):
+        ingest_sections(self.iso, 'Access', '1', {
+            '1': 'Access access access reviews need an audit.',
+            '2': 'Access reviews need an audit audit audit.',
+            '3': 'Access is granted by managers.',
+            '4': 'Access is revoked on exit.'
+        })
+        results = self.search('access audit')['results']
+        self.assertEqual([r['section_number'] for r in results], ['2', '1'])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+
+    def test_framework_and_latest_only_filters(self):
+        ingest_sections(self.iso, 'Retention', '1', {'1': 'Retention of logs is ninety days.'})
+        ingest_sections(self.iso, 'Retention', '2', {'1': 'Retention of logs is thirty days.'})
+        ingest_sections(self.soc, 'Retention', '1', {'1': 'Retention of logs is one year.'})
+
+        self.assertEqual(self.search('retention')['total'], 3)
+        only_iso = self.search('retention', framework_id=self.iso.id)['results']
+        self.assertEqual({r['framework'] for r in only_iso}, {'ISO 27001'})
+        latest = self.search('retention', framework_id=self.iso.id, latest_only='1')['results']
+        self.assertEqual([(r['version'], r['latest']) for r in latest], [('2', True)])
+
+    def test_pagination(self):
+        ingest_sections(self.iso, 'Backups', '1', {str(n): f'Backup copy {n} is encrypted.' for n in range(1, 6)})
+        pages = [self.search('encrypted backup', page=page, page_size=2) for page in (1, 2, 3)]
+
+        self.assertEqual([p['total'] for p in pages], [5, 5, 5])
+        self.assertEqual([len(p['results']) for p in pages], [2, 2, 1])
+        ids = [r['section_id'] for p in pages for r in p['results']]
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'backup', 'page': 0}).status_code, 400)
+
+    def test_rebuilt_index_finds_existing_sections(self):
+        ingest_sections(self.iso, 'Access', '1', {'1': 'Passwords rotate yearly.'})
+        SearchPosting.objects.all().delete()
+        self.assertEqual(self.search('passwords')['total'], 0)
+
+        rebuild_index()
+        self.assertEqual(self.search('passwords')['total'], 1)
+
+
+class FrameworkExportTests(TestCase):
+    """Framework exports restore as an equivalent framework."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.framework = Framework.objects.create(name='ISO 27001', description='Controls')
+        self.v1, _ = ingest_sections(
+            self.framework, 'Access', '1', {'1': 'Scope.', '2': 'Rotate yearly.'},
+            SimpleUploadedFile('access.pdf', b'%PDF-1 first')
+        )
+        self.v2, _ = ingest_sections(
+            self.framework, 'Access', '2', {'1': 'Scope.', '2': 'Rotate quarterly.', '3': 'Audit.'},
+            SimpleUploadedFile('access.pdf', b'%PDF-1 second')
+        )
+        ingest_sections(self.framework, 'Logging', '1', {'1': 'Scope.'})
+        PolicyVersion.objects.filter(id=self.v1.id).update(created_at=datetime(2024, 1, 2, tzinfo=dt_timezone.utc))
+
+    def export(self, fmt):
+        response = self.client.get(f'/api/frameworks/{self.framework.id}/export/', {'format': fmt})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def restore(self, data, filename):
+        return self.client.post('/api/frameworks/import/', {
+            'archive': SimpleUploadedFile(filename, data), 'name': f'Restored {filename}'
+        })
+
+    def assertRestored(self, framework_id):
+        restored = Framework.objects.get(id=framework_id)
+        versions = {
+            (v.policy.title, v.version): v
+            for v in PolicyVersion.objects.filter(policy__framework=restored).select_related('policy')
+        }
+        self.assertEqual(set(versions), {('Access', '1'), ('Access', '2'), ('Logging', '1')})
+        for original in PolicyVersion.objects.filter(policy__framework=self.framework).select_related('policy'):
+            copy = versions[original.policy.title, original.version]
+            self.assertEqual(copy.created_at, original.created_at)
+            self.assertEqual(copy.change_summary, original.change_summary)
+            self.assertEqual(copy.uploaded_file.name, original.uploaded_file.name)
+            self.assertEqual(
+                sorted(copy.sections.values_list('section_number', 'blob_id', 'archived')),
+                sorted(original.sections.values_list('section_number', 'blob_id', 'archived'))
+            )
+        access = Policy.objects.get(framework=restored, title='Access')
+        self.assertEqual(access.latest_version, versions['Access', '2'])
+        fields = ('versions',) + change_stats.STAT_FIELDS
+        self.assertEqual(
+            FrameworkChangeStats.objects.filter(framework=restored).values_list(*fields).get(),
+            FrameworkChangeStats.objects.filter(framework=self.framework).values_list(*fields).get()
+        )
+
+    def test_ndjson_round_trip(self):
+        data = self.export('ndjson')
+        records = [json.loads(line) for line in data.decode('utf-8').splitlines()]
+        blobs = [r['digest'] for r in records if r['type'] == 'blob']
+        # 'Scope.' is shared by three versions but exported once.
+        self.assertEqual(len(blobs), len(set(blobs)))
+        self.assertEqual(len(blobs), 4)
+
+        response = self.restore(data, 'export.ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['versions'], 3)
+        self.assertRestored(response.json()['framework_id'])
+
+    def test_zip_round_trip_restores_files(self):
+        data = self.export('zip')
+        storage = self.v2.uploaded_file.storage
+        storage.delete(self.v2.uploaded_file.name)
+
+        response = self.restore(data, 'export.zip')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['files'], 2)
+        self.assertRestored(response.json()['framework_id'])
+        with storage.open(self.v2.uploaded_file.name) as fh:
+            self.assertEqual(fh.read(), b'%PDF-1 second')
+
+    def test_bad_exports_are_rejected(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('other.txt', 'nothing')
+        bad = [
+            (b'', 'empty.ndjson'),
+            (b'{"type": "policy", "id": 1, "title": "Access"}\n', 'headless.ndjson'),
+            (b'{"type": "framework", "format": 99, "name": "x"}\n', 'future.ndjson'),
+            (b'not json\n', 'garbage.ndjson'),
+            (archive.getvalue(), 'other.zip'),
+        ]
+        frameworks = Framework.objects.count()
+        for data, filename in bad:
+            response = self.restore(data, filename)
+            self.assertEqual(response.status_code, 400, filename)
+        self.assertEqual(Framework.objects.count(), frameworks)
+
+
+class MoveDetectionTests(TestCase):
+    """Renumbered sections are reported as moves, dissimilar ones are not."""
+
+    backups = (
+        'Backups of production databases are taken every night, encrypted with managed keys, '
+        'copied to a second region and restored in a quarterly test that is signed off by the service owner.'
+    )
+
+    def setUp(self):
+        self.framework = Framework.objects.create(name='ISO 27001', description='')
+        ingest_sections(self.framework, 'Continuity', '1', {
+            '1': 'This policy covers every production system.',
+            '2': self.backups,
+            '3': 'Incidents are reported to the security team within one hour.'
+        })
+
+    def upload_v2(self, section_4):
+        _, summary = ingest_sections(self.framework, 'Continuity', '2', {
+            '1': 'This policy covers every production system.',
+            '3': 'Incidents are reported to the security team within one hour.',
+            '4': section_4
+        })
+        return summary
+
+    def test_renumbered_section_is_moved(self):
+        summary = self.upload_v2(self.backups)
+
+        self.assertEqual(
+            [(c['section'], c['type'], c['from_section']) for c in summary['changes']], [('4', 'moved', '2')]
+        )
+        self.assertEqual(summary['deprecations'], [])
+        self.assertEqual(summary['stats']['sections_moved'], 1)
+        self.assertEqual(summary['stats']['sections_removed'], 0)
+
+    def test_renumbered_and_edited_section_is_moved_and_modified(self):
+        summary = self.upload_v2(self.backups.replace('every night', 'every six hours'))
+
+        change, = summary['changes']
+        self.assertEqual((change['section'], change['type'], change['from_section']), ('4', 'moved+modified', '2'))
+        self.assertEqual((change['lines_added'], change['lines_removed']), (1, 1))
+        self.assertEqual(summary['deprecations'], [])
+
+    def test_dissimilar_section_is_removed_and_added(self):
+        summary = self.upload_v2(
+            'Backups of laptops are not taken; staff keep their working files in the shared document store.'
+        )
+
+        self.assertEqual([(c['section'], c['type']) for c in summary['changes']], [('4', 'added')])
+        self.assertNotIn('from_section', summary['changes'][0])
+        self.assertEqual([d['section'] for d in summary['deprecations']], ['2'])
+
+    def test_threshold(self):
+        edited = self.backups.replace('quarterly', 'yearly').replace('second region', 'tape vault')
+        score = jaccard(shingles(self.backups), shingles(edited))
+        self.assertEqual(
+            match_moves({'2': self.backups}, {'4': edited}, threshold=score), [('2', '4', round(score, 4))]
+        )
+        self.assertEqual(match_moves({'2': self.backups}, {'4': edited}, threshold=score + 0.01), [])
+
+
+class IngestionJobTests(TestCase):
+    """async=1 uploads create a job whose status can be polled (inline workers)."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.framework = Framework.objects.create(name='ISO 27001', description='')
+
+    def enqueue(self, **data):
+        response = self.client.post('/api/upload_policy_pdf/', {
+            'framework_id': self.framework.id, 'policy_title': 'Access', 'version': '1', 'async': '1', **data
+        })
+        self.assertEqual(response.status_code, 202)
+        body = response.json()
+        self.assertEqual(body['status_url'], f'/api/ingestion_jobs/{body["job_id"]}/')
+        return body['job_id'], self.client.get(body['status_url']).json()
+
+    def test_text_job_succeeds(self):
+        job_id, status = self.enqueue(text_content='Access Policy\n1\nScope.\n2\nPasswords rotate.')
+
+        self.assertEqual((status['status'], status['progress'], status['error']), ('succeeded', 100, None))
+        self.assertEqual(status['change_summary']['stats']['total_sections'], 2)
+        self.assertEqual(PolicyVersion.objects.get(id=status['version_id']).policy.title, 'Access')
+
+    def test_pdf_job_succeeds_and_drops_its_source_file(self):
+        pdf = sections_to_pdf('Access Policy', {'1': 'Scope.', '2': 'Passwords rotate.'})
+        job_id, status = self.enqueue(uploaded_file=SimpleUploadedFile('access.pdf', pdf, 'application/pdf'))
+
+        self.assertEqual(status['status'], 'succeeded')
+        version = PolicyVersion.objects.get(id=status['version_id'])
+        self.assertEqual(version.sections.filter(archived=False).count(), 2)
+        self.assertFalse(IngestionJob.objects.get(id=job_id).source_file)
+
+    def test_failed_job_reports_the_error(self):
+        with self.assertLogs('compliance_app.jobs', 'ERROR'):
+            job_id, status = self.enqueue(
+                uploaded_file=SimpleUploadedFile('broken.pdf', b'not a pdf', 'application/pdf')
+            )
+
+        self.assertEqual(status['status'], 'failed')
+        self.assertTrue(status['error'])
+        self.assertIsNone(status['change_summary'])
+        self.assertIsNone(status['version_id'])
+
+    def test_unknown_job_and_framework(self):
+        self.assertEqual(self.client.get('/api/ingestion_jobs/999/').status_code, 404)
+        response = self.client.post('/api/upload_policy_pdf/', {
+            'framework_id': 999, 'policy_title': 'Access', 'version': '1', 'async': '1',
+            'text_content': '1\nScope.'
+        })
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(IngestionJob.objects.exists())
+
+
+class ChangeHistoryTests(TestCase):
+    """Cursor pagination, field selection and NDJSON framing of change history."""
+
+    def setUp(self):
+        self.framework = Framework.objects.create(name='ISO 27001', description='')
+        for n in range(1, 6):
+            version, _ = ingest_sections(
+                self.framework, 'Access', str(n), {'1': f'Passwords rotate every {n} days.'}
+            )
+        self.policy = version.policy
+        # Versions 2-4 share a timestamp, so pages must break ties by id.
+        shared = PolicyVersion.objects.get(policy=self.policy, version='2').created_at
+        PolicyVersion.objects.filter(policy=self.policy, version__in=['3', '4']).update(created_at=shared)
+        self.url = f'/api/change_history/{self.policy.id}/'
+
+    def page(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_are_stable_across_inserts(self):
+        first = self.page(limit=2, fields='version')
+        self.assertEqual([h['version'] for h in first['history']], ['5', '4'])
+
+        ingest_sections(self.framework, 'Access', '6', {'1': 'Passwords rotate every 6 days.'})
+
+        second = self.page(limit=2, fields='version', cursor=first['next_cursor'])
+        third = self.page(limit=2, fields='version', cursor=second['next_cursor'])
+        self.assertEqual([h['version'] for h in second['history']], ['3', '2'])
+        self.assertEqual([h['version'] for h in third['history']], ['1'])
+        self.assertIsNone(third['next_cursor'])
+
+    def test_invalid_cursor_and_fields(self):
+        bad_date = base64.urlsafe_b64encode(json.dumps(['yesterday', 1]).encode()).decode()
+        for params in ({'cursor': 'not-a-cursor'}, {'cursor': bad_date}, {'fields': 'secret'}, {'limit': '0'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+    def test_fields_and_expand(self):
+        compact = self.page(limit=1)['history'][0]
+        self.assertEqual(set(compact), {'version_id', 'version', 'created_at', 'changes'})
+        self.assertNotIn('diff', compact['changes']['changes'][0])
+
+        expanded = self.page(limit=1, expand='1')['history'][0]['changes']['changes'][0]
+        self.assertEqual(expanded['old_content'], 'Passwords rotate every 4 days.')
+        self.assertEqual(expanded['new_content'], 'Passwords rotate every 5 days.')
+        self.assertIn('+Passwords rotate every 5 days.', expanded['diff'])
+
+        self.assertEqual(self.page(fields='version_id,version')['history'][0].keys(), {'version_id', 'version'})
+
+    def test_ndjson_framing(self):
+        response = self.client.get(self.url, {'format': 'ndjson', 'limit': 2, 'fields': 'version'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(body.endswith('\n'))
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(records[:2], [{'version': '5'}, {'version': '4'}])
+        self.assertEqual(set(records[2]), {'next_cursor'})
+
+        rest = self.client.get(
+            self.url, {'format': 'ndjson', 'fields': 'version', 'cursor': records[2]['next_cursor']}
+        )
+        lines = b''.join(rest.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['version'] for line in lines], ['3', '2', '1'])
+
+
+class ChangeSummaryTests(TestCase):
+    """Stored summaries reference blobs; expansion restores the full text."""
+
+    def test_expand_round_trip(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        ingest_sections(framework, 'Access', '1', {'1': 'Passwords rotate yearly.', '2': 'Badges are logged.'})
+        version, summary = ingest_sections(
+            framework, 'Access', '2', {'1': 'Passwords rotate quarterly.', '3': 'Visitors are escorted.'}
+        )
+
+        version.refresh_from_db()
+        self.assertEqual(version.change_summary, summary)
+        for change in summary['changes']:
+            self.assertFalse({'old_content', 'new_content', 'diff'} & set(change))
+        self.assertNotIn('content', summary['deprecations'][0])
+
+        expanded = expand_change_summary(version.change_summary, version.id)
+        changes = {c['section']: c for c in expanded['changes']}
+        self.assertEqual(changes['1']['old_content'], 'Passwords rotate yearly.')
+        self.assertEqual(changes['1']['new_content'], 'Passwords rotate quarterly.')
+        self.assertEqual(
+            changes['1']['diff'], PolicyDiff.objects.get(version=version, section_number='1').diff_text
+        )
+        self.assertEqual((changes['3']['type'], changes['3']['old_content']), ('added', ''))
+        self.assertEqual(changes['3']['new_content'], 'Visitors are escorted.')
+        self.assertEqual(expanded['deprecations'][0]['content'], 'Badges are logged.')
+        self.assertEqual(expanded['stats'], summary['stats'])
+
+
+class RenderCacheTests(TestCase):
+    """Editor renders are cached by content and bounded on disk."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.framework = Framework.objects.create(name='ISO 27001', description='')
+
+    def post(self, sections):
+        return self.client.post('/api/generate_pdf/', json.dumps({
+            'title': 'Access',
+            'version': '1',
+            'framework_id': self.framework.id,
+            'sections': [{'section_number': num, 'content': content} for num, content in sections]
+        }), content_type='application/json')
+
+    def generate(self, sections):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(sections)
+        self.assertEqual(response.status_code, 200)
+        return PolicyVersion.objects.get(id=response.json()['version_id'])
+
+    def test_generate_and_section_saves_share_renders(self):
+        version = self.generate([('10', 'Audit.  '), ('2', ' Rotate yearly.'), ('1', 'Scope.')])
+        self.assertTrue(version.uploaded_file.name.startswith('renders/'))
+
+        before = rendering.stats()
+        rendering.render_current(version.id)
+        after = rendering.stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['renders'], before['renders'])
+        version.refresh_from_db()
+        self.assertEqual(version.render_key, rendering.render_key(
+            'Access', '1', [['1', 'Scope.'], ['2', 'Rotate yearly.'], ['10', 'Audit.']]
+        ))
+
+    def test_same_content_is_served_from_the_cache(self):
+        version = self.generate([('1', 'Scope.')])
+        rendered = version.uploaded_file.name
+
+        response = self.post([('1', 'Scope.  ')])
+        self.assertEqual(response.json()['render'], 'cached')
+        version.refresh_from_db()
+        self.assertEqual(version.uploaded_file.name, rendered)
+        self.assertEqual(self.post([('1', 'Scope, revised.')]).json()['render'], 'queued')
+
+    def test_query_count_does_not_grow_with_the_sections(self):
+        def queries(title, count):
+            ingest_sections(self.framework, title, '1', {str(n): f'Clause {n}.' for n in range(1, count + 1)})
+            sections = [{'section_number': str(n), 'content': f'Clause {n}, revised.'} for n in range(1, count + 1)]
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post('/api/generate_pdf/', json.dumps({
+                    'title': title, 'version': '2', 'framework_id': self.framework.id, 'sections': sections
+                }), content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            return len(captured)
+
+        self.assertEqual(queries('Small', 5), queries('Large', 50))
+
+    @override_settings(RENDER_CACHE_MAX_BYTES=1)
+    def test_unreferenced_renders_are_evicted(self):
+        version = self.generate([('1', 'Scope.')])
+        stale = [default_storage.save(f'renders/stale-{n}.pdf', ContentFile(b'%PDF' * 100)) for n in range(3)]
+
+        rendering.evict_renders()
+
+        self.assertTrue(default_storage.exists(version.uploaded_file.name))
+        self.assertEqual([name for name in stale if default_storage.exists(name)], [])
+
+
+@override_settings(WORKER_MODE='process', RENDER_COALESCE_SECONDS=0.2)
+class RenderCoalescingTests(TransactionTestCase):
+    """A burst of section saves is rendered once, after the burst."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def tearDown(self):
+        workers.shutdown()
+
+    def test_autosave_burst_renders_once(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        version, _ = ingest_sections(framework, 'Access', '1', {'1': 'Passwords rotate yearly.'})
+        before = rendering.stats()
+
+        for n in range(3):
+            base_hash = PolicySection.objects.get(version=version, section_number='1', archived=False).blob_id
+            response = self.client.post(f'/api/policy_versions/{version.id}/sections/', json.dumps({
+                'sections': [{'section_number': '1', 'base_hash': base_hash, 'content': f'Rotate every {n} days.'}]
+            }), content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+
+        deadline = time.monotonic() + 30
+        while not PolicyVersion.objects.get(id=version.id).uploaded_file and time.monotonic() < deadline:
+            time.sleep(0.05)
+        after = rendering.stats()
+        self.assertEqual(after['renders'] - before['renders'], 1)
+        self.assertEqual(after['coalesced'] - before['coalesced'], 2)
+        version.refresh_from_db()
+        self.assertEqual(version.uploaded_file.name, rendering.render_name(version.render_key))
+        self.assertEqual(
+            version.render_key, rendering.render_key('Access', '1', [['1', 'Rotate every 2 days.']])
+        )
+
+
+class BulkImportTests(TestCase):
+    """Bulk imports ingest each PDF of an archive as its own policy."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.framework = Framework.objects.create(name='ISO 27001', description='')
+        self.url = f'/api/frameworks/{self.framework.id}/bulk_import/'
+        self.archive_bytes = self.build_archive()
+
+    def build_archive(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('policies/Access.pdf', sections_to_pdf('Access', {
+                '1': 'Passwords rotate yearly.', '2': 'Badges are logged.'
+            }))
+            zf.writestr('policies/Backup.pdf', sections_to_pdf('Backup', {'1': 'Backups run nightly.'}))
+            zf.writestr('policies/Broken.pdf', b'not a pdf')
+            zf.writestr('policies/README.txt', b'ignored')
+        return buffer.getvalue()
+
+    def archive(self):
+        return SimpleUploadedFile('policies.zip', self.archive_bytes, 'application/zip')
+
+    def test_archive_import_and_reimport(self):
+        body = self.client.post(self.url, {'version': '1', 'archive': self.archive()}).json()
+
+        self.assertEqual((body['imported'], body['failed']), (2, 1))
+        results = {r['file']: r for r in body['results']}
+        self.assertEqual(set(results), {'Access.pdf', 'Backup.pdf', 'Broken.pdf'})
+        self.assertEqual(results['Access.pdf']['stats']['sections_added'], 2)
+        self.assertEqual(results['Broken.pdf']['status'], 'failed')
+        access = PolicyVersion.objects.get(id=results['Access.pdf']['version_id'])
+        self.assertEqual(access.policy.title, 'Access')
+        self.assertEqual(access.policy.latest_version_id, access.id)
+        self.assertEqual(
+            dict(access.sections.values_list('section_number', 'blob__content')),
+            {'1': 'Passwords rotate yearly.', '2': 'Badges are logged.'}
+        )
+
+        hits = extraction_cache.stats()['hits']
+        again = self.client.post(self.url, {'version': '2', 'archive': self.archive()}).json()
+        self.assertEqual(again['imported'], 2)
+        self.assertEqual(extraction_cache.stats()['hits'] - hits, 2)
+        self.assertEqual(
+            {r['file']: r.get('stats', {}).get('sections_modified') for r in again['results']},
+            {'Access.pdf': 0, 'Backup.pdf': 0, 'Broken.pdf': None}
+        )
+
+    def test_missing_input_is_rejected(self):
+        self.assertEqual(self.client.post(self.url, {'archive': self.archive()}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'version': '1'}).status_code, 400)
+        bad = SimpleUploadedFile('policies.zip', b'not a zip', 'application/zip')
+        response = self.client.post(self.url, {'version': '1', 'archive': bad})
+        self.assertEqual(response.json(), {'error': 'Invalid zip archive'})
+
+
+class RequestMetricsTests(TestCase):
+    """Stage timings reach the Server-Timing header and ``/metrics``."""
+
+    def metric(self, name):
+        for line in self.client.get('/metrics').content.decode().splitlines():
+            if line.startswith(name + ' '):
+                return float(line.rsplit(' ', 1)[1])
+        return 0.0
+
+    def test_stage_timings_are_reported(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        ingest_sections(framework, 'Access', '1', {'1': 'Passwords rotate yearly.'})
+        count = 'compliance_request_duration_seconds_count{route="api/generate_pdf/",method="POST"}'
+        stage = 'compliance_stage_duration_seconds_count{route="api/generate_pdf/",stage="blob_writes"}'
+        before = self.metric(count), self.metric(stage)
+
+        response = self.client.post('/api/generate_pdf/', json.dumps({
+            'title': 'Access', 'version': '2', 'framework_id': framework.id,
+            'sections': [{'section_number': '1', 'content': 'Passwords rotate quarterly.'}]
+        }), content_type='application/json')
+
+        timing = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertTrue({'pdf_render', 'blob_writes', 'diff', 'summary_save', 'db', 'total'} <= set(timing))
+        self.assertRegex(timing['db'], r'^desc="\d+ queries"$')
+        self.assertGreater(float(timing['total'].removeprefix('dur=')), 0)
+
+        metrics = self.client.get('/metrics')
+        self.assertTrue(metrics['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertEqual((self.metric(count), self.metric(stage)), (before[0] + 1, before[1] + 1))
+        self.assertGreater(self.metric('compliance_render_cache_misses_total'), 0)
+        self.assertIn('# TYPE compliance_request_queries histogram', metrics.content.decode())
+
+
+class ReadCacheTests(TestCase):
+    """Cached reads are dropped by the writes that change them."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        self.framework = Framework.objects.create(name='ISO 27001', description='')
+        self.version, _ = ingest_sections(self.framework, 'Access', '1', {'1': 'Passwords rotate yearly.'})
+
+    def contents(self):
+        return [s['content'] for s in read_cache.version_sections(self.version.id)]
+
+    def diffs(self):
+        return self.client.get(f'/api/policy_diffs/{self.version.id}/').json()
+
+    def test_upload_and_edit_invalidate(self):
+        self.assertEqual(self.contents(), ['Passwords rotate yearly.'])
+        self.assertEqual(len(self.diffs()), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.contents(), ['Passwords rotate yearly.'])
+
+        ingest_sections(self.framework, 'Access', '1', {'1': 'Passwords rotate yearly.', '2': 'Badges are logged.'})
+        self.assertEqual(self.contents(), ['Passwords rotate yearly.', 'Badges are logged.'])
+        self.assertEqual([d['section_number'] for d in self.diffs()], ['1', '2'])
+
+        base_hash = content_digest('Badges are logged.')
+        response = self.client.post(f'/api/policy_versions/{self.version.id}/sections/', json.dumps({
+            'sections': [{'section_number': '2', 'base_hash': base_hash, 'content': 'Badges are audited.'}]
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.contents(), ['Passwords rotate yearly.', 'Badges are audited.'])
+        self.assertIn('+Badges are audited.', self.diffs()[-1]['diff_text'])
+
+    def test_new_framework_invalidates_the_list(self):
+        self.assertEqual([f['name'] for f in read_cache.frameworks()], ['ISO 27001'])
+        self.client.post('/api/create_framework/', json.dumps({'name': 'SOC 2'}), content_type='application/json')
+        self.assertEqual([f['name'] for f in read_cache.frameworks()], ['ISO 27001', 'SOC 2'])
+
+
+class EditorConditionalTests(TestCase):
+    """The editor's ETag also covers the framework dropdown."""
+
+    def setUp(self):
+        framework = Framework.objects.create(name='ISO 27001', description='')
+        version, _ = ingest_sections(framework, 'Access', '1', {'1': 'Scope.'})
+        self.url = f'/editor/{version.id}/'
+        self.version_id = version.id
+
+    def test_new_framework_invalidates_the_editor_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+        self.client.post('/api/create_framework/', json.dumps({'name': 'SOC 2'}), content_type='application/json')
+
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    async def test_async_editor_uses_the_same_validators(self):
+        factory = AsyncRequestFactory()
+        etag = (await async_views.edit_policy(factory.get(self.url), self.version_id))['ETag']
+        response = await async_views.edit_policy(factory.get(self.url, headers={'If-None-Match': etag}), self.version_id)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('Last-Modified', response)
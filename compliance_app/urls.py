@@ -1,13 +1,31 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the hot endpoints are served by their async counterparts.
+hot = async_views if getattr(settings, 'ASYNC_VIEWS', False) else views
 
 urlpatterns = [
-    path('api/frameworks/', views.get_frameworks),
+    path('metrics', views.metrics),
+    path('api/frameworks/', hot.get_frameworks),
     path('api/create_framework/', views.create_framework),
-    path('api/upload_policy_pdf/', views.upload_policy_pdf),
-    path('api/policy_diffs/<int:version_id>/', views.policy_diffs),
-    path('editor/<int:version_id>/', views.edit_policy),
-    path('editor/', views.edit_policy),
-    path('api/generate_pdf/', views.generate_pdf),
+    path('api/upload_policy_pdf/', hot.upload_policy_pdf),
+    path('api/frameworks/<int:framework_id>/bulk_import/', views.bulk_import_policies),
+    path('api/frameworks/<int:framework_id>/change_stats/', views.framework_change_stats),
+    path('api/frameworks/<int:framework_id>/export/', views.export_framework),
+    path('api/frameworks/import/', views.import_framework),
+    path('api/ingestion_jobs/<int:job_id>/', hot.ingestion_job_status),
+    path('api/extraction_cache/', views.extraction_cache_stats),
+    path('api/render_cache/', views.render_cache_stats),
+    path('api/search/', views.search_policies),
+    path('api/policy_diffs/<int:version_id>/', hot.policy_diffs),
+    path('api/policy_versions/<int:version_id>/download/', views.download_policy_version),
+    path('api/policy_versions/<int:version_id>/sections/', hot.save_sections),
+    path('api/policy_versions/<int:version_id>/sections/<str:section_number>/', views.section_subtree),
+    path('editor/<int:version_id>/', hot.edit_policy),
+    path('editor/', hot.edit_policy),
+    path('api/generate_pdf/', hot.generate_pdf),
     path('api/change_history/<int:policy_id>/', views.policy_change_history),
+    path('api/policies/<int:policy_id>/change_stats/', views.policy_change_stats),
+    path('api/policies/<int:policy_id>/compare/<int:from_version_id>/<int:to_version_id>/', views.compare_policy_versions),
 ]
\ No newline at end of file
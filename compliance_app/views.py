@@ -1,22 +1,38 @@
-import re
 import json
-import difflib
-from io import BytesIO
+import time
+import zipfile
+from datetime import timedelta
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_GET, require_POST
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import condition, require_GET, require_POST, require_safe
 from django.shortcuts import render, get_object_or_404
-from pdfminer.high_level import extract_text
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from .models import Framework, Policy, PolicyVersion, PolicySection, PolicyDiff
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F
+from .models import (
+    Framework, Policy, PolicyVersion, IngestionJob, ChangeStatsBucket, FrameworkChangeStats, PolicyChangeStats
+)
+from .ingestion import iter_pdf_pages, parse_document, ingest_sections, previous_pages, section_pattern
+from .metrics import QueryCounter, prometheus_exposition, stage, timed_iterator
+from .jobs import enqueue_ingestion
+from .bulk_import import bulk_import
+from .change_stats import COUNT_FIELDS, empty_counts
+from .compare import compare_versions
+from .conditional import add_validators, editor_validators, not_modified, version_validators
+from .outline import subtree
+from .search import search_sections
+from .summaries import expand_change_summary
+from .editing import EditConflict, apply_section_edits, parse_edits
+from .downloads import UnsatisfiableRange, file_etag, if_range_matches, iter_file_range, parse_range
+from .pagination import InvalidCursor, encode_cursor, keyset_filter, parse_limit
+from . import exports, extraction_cache, read_cache, rendering
+from .rendering import cached_render, render_key, render_sections, schedule_render
 
 @require_GET
 def get_frameworks(request):
-    frameworks = Framework.objects.all().values('id', 'name')
-    return JsonResponse(list(frameworks), safe=False)
+    return JsonResponse(read_cache.frameworks(), safe=False)
 
 @csrf_exempt
 def create_framework(request):
@@ -28,6 +44,7 @@ def create_framework(request):
             if not name:
                 return JsonResponse({'error': 'Name is required'}, status=400)
             framework = Framework.objects.create(name=name, description=description)
+            read_cache.invalidate_frameworks()
             return JsonResponse({'message': 'Framework created', 'framework_id': framework.id}, status=201)
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
@@ -50,182 +67,340 @@ def upload_policy_pdf(request):
     if not text_content and not uploaded_file:
         return JsonResponse({'error': 'Either text content or a PDF file must be provided'}, status=400)
 
+    if request.POST.get('async') in ('1', 'true'):
+        try:
+            framework = Framework.objects.get(id=framework_id)
+        except Framework.DoesNotExist:
+            return JsonResponse({'error': 'Framework not found'}, status=404)
+
+        job = IngestionJob.objects.create(
+            framework=framework,
+            policy_title=title,
+            version=version,
+            source_file=None if text_content else uploaded_file,
+            text_content=text_content or ''
+        )
+        enqueue_ingestion(job)
+        return JsonResponse({
+            'message': f'Policy "{title}" v{version} queued for ingestion.',
+            'job_id': job.id,
+            'status_url': f'/api/ingestion_jobs/{job.id}/'
+        }, status=202)
+
+    try:
+        framework = Framework.objects.get(id=framework_id)
+    except Framework.DoesNotExist:
+        return JsonResponse({'error': 'Framework not found'}, status=404)
+
+    digest = None
+    cached = None
+    page_texts = None
     if text_content:
-        lines = text_content.strip().splitlines()
+        pages = [(None, text_content.strip().splitlines(), True)]
     elif uploaded_file:
-        buffer = BytesIO(uploaded_file.read())
-        text = extract_text(buffer)
-        lines = text.strip().splitlines()
+        digest = extraction_cache.file_digest(uploaded_file)
+        cached = extraction_cache.lookup(digest)
+        pages = iter_pdf_pages(uploaded_file, previous_pages(framework, title)) if cached is None else None
     else:
         return JsonResponse({'error': 'No content provided'}, status=400)
 
-    if len(lines) < 1:
-        return JsonResponse({'error': 'Content must have at least a title'}, status=400)
+    cache_hit = cached is not None
+    if cache_hit:
+        sections, outline = cached
+    else:
+        with stage('parse'):
+            sections, outline, page_texts = parse_document(timed_iterator(pages, 'extract'))
+        if not outline['lines']:
+            return JsonResponse({'error': 'Content must have at least a title'}, status=400)
+        if digest:
+            extraction_cache.store(digest, sections, outline)
+
+    counter = QueryCounter()
+    with counter:
+        version_obj, change_summary = ingest_sections(
+            framework, title, version, sections, uploaded_file, outline, page_texts
+        )
 
-    content_lines = lines
+    return JsonResponse({
+        'message': f'Policy "{title}" v{version} uploaded successfully.',
+        'version_id': version_obj.id,
+        'changes': change_summary,
+        'query_count': counter.count,
+        'extraction_cache': ('hit' if cache_hit else 'miss') if digest else None
+    })
 
-    section_pattern = re.compile(r'^(\d+(\.\d+)*)$')
-    sections = {}
-    current_section = None
-    content_buffer = []
+@csrf_exempt
+@require_POST
+def bulk_import_policies(request, framework_id):
+    framework = get_object_or_404(Framework, id=framework_id)
+    version = request.POST.get('version')
+    archive = request.FILES.get('archive')
+    files = request.FILES.getlist('files')
+    if not version:
+        return JsonResponse({'error': 'Missing or invalid input: version'}, status=400)
+    if not archive and not files:
+        return JsonResponse({'error': 'Provide a zip archive or one or more PDF files'}, status=400)
+
+    start = time.perf_counter()
+    try:
+        results = bulk_import(framework, version, archive=archive, files=files)
+    except zipfile.BadZipFile:
+        return JsonResponse({'error': 'Invalid zip archive'}, status=400)
 
-    for line in content_lines:
-        line = line.strip()
-        if section_pattern.match(line):
-            if current_section and content_buffer:
-                sections[current_section] = '\n'.join(content_buffer).strip()
-                content_buffer = []
-            current_section = line
-        elif current_section and line:
-            content_buffer.append(line)
+    return JsonResponse({
+        'framework_id': framework.id,
+        'version': version,
+        'imported': len([r for r in results if r['status'] == 'imported']),
+        'failed': len([r for r in results if r['status'] == 'failed']),
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+        'results': results
+    })
 
-    if current_section and content_buffer:
-        sections[current_section] = '\n'.join(content_buffer).strip()
+@require_GET
+def export_framework(request, framework_id):
+    """Stream every policy, version, section and diff of a framework."""
+    framework = get_object_or_404(Framework, id=framework_id)
+    if request.GET.get('format', 'ndjson') == 'zip':
+        response = StreamingHttpResponse(exports.iter_zip(framework), content_type='application/zip')
+        filename = f'framework-{framework.id}.zip'
+    else:
+        response = StreamingHttpResponse(exports.iter_ndjson(framework), content_type='application/x-ndjson')
+        filename = f'framework-{framework.id}.ndjson'
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+@csrf_exempt
+@require_POST
+def import_framework(request):
+    archive = request.FILES.get('archive')
+    if not archive:
+        return JsonResponse({'error': 'Provide an NDJSON or zip framework export as "archive"'}, status=400)
 
     try:
-        framework = Framework.objects.get(id=framework_id)
-    except Framework.DoesNotExist:
-        return JsonResponse({'error': 'Framework not found'}, status=404)
+        with exports.open_export(archive) as (lines, open_file):
+            framework, counts = exports.import_framework(lines, open_file, name=request.POST.get('name'))
+    except (ValueError, KeyError, zipfile.BadZipFile) as e:
+        return JsonResponse({'error': f'Invalid export: {str(e)}'}, status=400)
+
+    return JsonResponse({'framework_id': framework.id, **counts}, status=201)
+
+@require_GET
+def ingestion_job_status(request, job_id):
+    job = get_object_or_404(IngestionJob, id=job_id)
+    return JsonResponse({
+        'job_id': job.id,
+        'status': job.status,
+        'progress': job.progress,
+        'version_id': job.policy_version_id,
+        'change_summary': job.change_summary if job.status == 'succeeded' else None,
+        'error': job.error or None
+    })
+
+@require_GET
+def metrics(request):
+    return HttpResponse(prometheus_exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@require_GET
+def extraction_cache_stats(request):
+    return JsonResponse(extraction_cache.stats())
 
-    policy, _ = Policy.objects.get_or_create(framework=framework, title=title)
-    version_obj, created = PolicyVersion.objects.get_or_create(
-        policy=policy,
-        version=version,
-        defaults={'uploaded_file': uploaded_file}
+@require_GET
+def render_cache_stats(request):
+    return JsonResponse(rendering.stats())
+
+@require_GET
+def framework_change_stats(request, framework_id):
+    """Change totals of a framework and its last ``days`` daily buckets."""
+    framework = get_object_or_404(Framework.objects.only('id', 'name'), id=framework_id)
+    try:
+        days = parse_limit(request.GET.get('days'), 30, 366)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid days'}, status=400)
+
+    totals = FrameworkChangeStats.objects.filter(framework=framework).values(*COUNT_FIELDS).first()
+    since = timezone.now().date() - timedelta(days=days - 1)
+    buckets = (
+        ChangeStatsBucket.objects.filter(framework=framework, day__gte=since)
+        .order_by('day')
+        .values('day', *COUNT_FIELDS)
     )
+    return JsonResponse({
+        'framework_id': framework.id,
+        'framework': framework.name,
+        'totals': totals or empty_counts(),
+        'days': [{**bucket, 'day': bucket['day'].isoformat()} for bucket in buckets]
+    })
+
+@require_GET
+def policy_change_stats(request, policy_id):
+    policy = get_object_or_404(Policy.objects.only('id', 'title', 'framework_id'), id=policy_id)
+    totals = PolicyChangeStats.objects.filter(policy=policy).values(*COUNT_FIELDS).first()
+    return JsonResponse({
+        'policy_id': policy.id,
+        'policy_title': policy.title,
+        'framework_id': policy.framework_id,
+        'totals': totals or empty_counts()
+    })
 
-    if not created and uploaded_file:
-        version_obj.uploaded_file = uploaded_file
-        version_obj.save()
-
-    existing_sections = PolicySection.objects.filter(version=version_obj)
-    existing_section_map = {s.section_number: s for s in existing_sections}
-    
-    existing_sections.exclude(Q(section_number__in=sections.keys())).update(archived=True)
-
-    prev_versions = PolicyVersion.objects.filter(policy=policy).exclude(id=version_obj.id).order_by('-created_at')
-    old_sections = {}
-    if prev_versions.exists():
-        prev = prev_versions.first()
-        old_sections = {s.section_number: s.content for s in prev.sections.all()}
-
-    changes = []
-    deprecations = []
-    
-    for sec_num, content in sections.items():
-        old_content = old_sections.get(sec_num, "")
-        section = existing_section_map.get(sec_num)
-        
-        if section:
-            if section.content.strip() == content.strip():
-                section.archived = False
-                section.save()
-                continue
-            
-            section.content = content
-            section.archived = False
-            section.save()
-        else:
-            section = PolicySection.objects.create(
-                version=version_obj,
-                section_number=sec_num,
-                content=content,
-                archived=False
-            )
-
-        if not section or old_content.strip() != content.strip():
-            diff = '\n'.join(difflib.unified_diff(
-                old_content.splitlines(),
-                content.splitlines(),
-                fromfile=f'{prev.version}:{sec_num}' if prev_versions.exists() else 'original',
-                tofile=f'{version}:{sec_num}',
-                lineterm=''
-            ))
-            
-            change_type = "modified" if sec_num in old_sections else "added"
-            
-            changes.append({
-                'section': sec_num,
-                'type': change_type,
-                'old_content': old_content,
-                'new_content': content,
-                'diff': diff
-            })
-            
-            PolicyDiff.objects.create(
-                version=version_obj,
-                section_number=sec_num,
-                diff_text=diff,
-                change_details={
-                    'change_type': change_type,
-                    'old_content': old_content,
-                    'new_content': content,
-                    'timestamp': version_obj.created_at.isoformat(),
-                    'diff': diff
+@require_GET
+def compare_policy_versions(request, policy_id, from_version_id, to_version_id):
+    versions = {
+        v.id: v for v in PolicyVersion.objects.filter(
+            policy_id=policy_id, id__in=[from_version_id, to_version_id]
+        ).only('id', 'version', 'fingerprint')
+    }
+    if from_version_id not in versions or to_version_id not in versions:
+        return JsonResponse({'error': 'Version not found for this policy'}, status=404)
+    return JsonResponse(compare_versions(versions[from_version_id], versions[to_version_id]))
+
+def _download_target(request, version_id):
+    """The version's stored file, looked up once per request."""
+    if not hasattr(request, '_download_target'):
+        target = None
+        version_obj = (
+            PolicyVersion.objects.select_related('policy')
+            .only('id', 'version', 'uploaded_file', 'policy__title')
+            .filter(id=version_id)
+            .first()
+        )
+        if version_obj and version_obj.uploaded_file:
+            storage = version_obj.uploaded_file.storage
+            name = version_obj.uploaded_file.name
+            if storage.exists(name):
+                target = {
+                    'version': version_obj,
+                    'storage': storage,
+                    'name': name,
+                    'etag': file_etag(storage, name),
+                    'last_modified': storage.get_modified_time(name)
                 }
-            )
-
-    for sec_num in set(old_sections.keys()) - set(sections.keys()):
-        deprecations.append({
-            'section': sec_num,
-            'content': old_sections[sec_num],
-            'removed_in_version': version
-        })
-        
-        PolicyDiff.objects.create(
-            version=version_obj,
-            section_number=sec_num,
-            diff_text=f"Section {sec_num} was removed",
-            change_details={
-                'change_type': 'removed',
-                'old_content': old_sections[sec_num],
-                'new_content': '',
-                'timestamp': version_obj.created_at.isoformat(),
-                'diff': f"Section {sec_num} was removed in version {version}"
-            }
+        request._download_target = target
+    return request._download_target
+
+def _download_etag(request, version_id):
+    target = _download_target(request, version_id)
+    return target and target['etag']
+
+def _download_last_modified(request, version_id):
+    target = _download_target(request, version_id)
+    return target and target['last_modified']
+
+@require_safe
+@condition(etag_func=_download_etag, last_modified_func=_download_last_modified)
+def download_policy_version(request, version_id):
+    target = _download_target(request, version_id)
+    if target is None:
+        return JsonResponse({'error': 'File not found'}, status=404)
+
+    storage, name = target['storage'], target['name']
+    size = storage.size(name)
+    try:
+        byte_range = None
+        if if_range_matches(request.headers.get('If-Range'), target['etag'], target['last_modified']):
+            byte_range = parse_range(request.headers.get('Range'), size)
+    except UnsatisfiableRange:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    version_obj = target['version']
+    filename = f'{version_obj.policy.title}-v{version_obj.version}.pdf'
+    fileobj = storage.open(name, 'rb')
+    if byte_range is None:
+        response = FileResponse(fileobj, content_type='application/pdf', as_attachment=True, filename=filename)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_file_range(fileobj, start, end - start + 1), status=206, content_type='application/pdf'
         )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Accept-Ranges'] = 'bytes'
+    return response
 
-    change_summary = {
-        'version': version,
-        'policy_title': title,
-        'framework': framework.name,
-        'created_at': version_obj.created_at.isoformat(),
-        'changes': changes,
-        'deprecations': deprecations,
-        'stats': {
-            'sections_added': len([c for c in changes if c['type'] == 'added']),
-            'sections_modified': len([c for c in changes if c['type'] == 'modified']),
-            'sections_removed': len(deprecations),
-            'total_sections': len(sections)
-        }
-    }
-    
-    version_obj.change_summary = change_summary
-    version_obj.save()
+SUBTREE_FIELDS = (
+    'id', 'section_number', 'parent_id', 'depth', 'start_page', 'start_offset', 'end_page', 'end_offset'
+)
+
+@require_GET
+def section_subtree(request, version_id, section_number):
+    version_obj = get_object_or_404(PolicyVersion.objects.only('id', 'version'), id=version_id)
+    if not section_pattern.match(section_number):
+        return JsonResponse({'error': 'Invalid section number'}, status=400)
+
+    sections = list(subtree(version_obj.id, section_number).values(*SUBTREE_FIELDS, content=F('blob__content')))
+    if not sections or sections[0]['section_number'] != section_number:
+        return JsonResponse({'error': 'Section not found'}, status=404)
 
     return JsonResponse({
-        'message': f'Policy "{title}" v{version} uploaded successfully.',
         'version_id': version_obj.id,
-        'changes': change_summary
+        'version': version_obj.version,
+        'section': section_number,
+        'sections': sections
+    })
+
+@require_GET
+def search_policies(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'Missing or invalid input: q'}, status=400)
+    try:
+        framework_id = int(request.GET['framework_id']) if request.GET.get('framework_id') else None
+        page = int(request.GET.get('page', 1))
+        page_size = parse_limit(request.GET.get('page_size'), 20, 100)
+        if page < 1:
+            raise ValueError('page must be positive')
+    except ValueError as e:
+        return JsonResponse({'error': f'Missing or invalid input: {str(e)}'}, status=400)
+
+    total, results = search_sections(
+        query,
+        framework_id=framework_id,
+        latest_only=request.GET.get('latest_only') in ('1', 'true'),
+        include_archived=request.GET.get('include_archived') in ('1', 'true'),
+        offset=(page - 1) * page_size,
+        limit=page_size
+    )
+    return JsonResponse({
+        'query': query,
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'results': results
     })
 
 @require_GET
 def policy_diffs(request, version_id):
-    diffs = PolicyDiff.objects.filter(version_id=version_id).values('section_number', 'diff_text')
-    return JsonResponse(list(diffs), safe=False)
+    header = read_cache.version_header(version_id)
+    validators = version_validators(header)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+    if header is None:
+        return JsonResponse([], safe=False)
+    body = read_cache.version_diffs_body(version_id, header['fingerprint'])
+    return add_validators(HttpResponse(body, content_type='application/json'), validators)
 
 @require_GET
 def edit_policy(request, version_id=None):
+    validators = None
     if version_id:
-        version = get_object_or_404(PolicyVersion, id=version_id)
-        sections = version.sections.filter(archived=False).values('section_number', 'content')
+        header = read_cache.version_header(version_id)
+        if header is None:
+            raise Http404('Policy version not found')
+        frameworks = read_cache.frameworks()
+        validators = editor_validators(header, frameworks)
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
         context = {
             'version_id': version_id,
-            'policy_title': version.policy.title,
-            'version': version.version,
-            'framework_id': version.policy.framework.id,
-            'sections': list(sections),
-            'frameworks': Framework.objects.all()
+            'policy_title': header['policy_title'],
+            'version': header['version'],
+            'framework_id': header['framework_id'],
+            'sections': read_cache.version_sections(version_id),
+            'frameworks': frameworks
         }
     else:
         context = {
@@ -234,9 +409,9 @@ def edit_policy(request, version_id=None):
             'version': '',
             'framework_id': None,
             'sections': [],
-            'frameworks': Framework.objects.all()
+            'frameworks': read_cache.frameworks()
         }
-    return render(request, 'editor.html', context)
+    return add_validators(render(request, 'editor.html', context), validators)
 
 @csrf_exempt
 @require_POST
@@ -256,89 +431,114 @@ def generate_pdf(request):
     except Framework.DoesNotExist:
         return JsonResponse({'error': 'Framework not found'}, status=404)
 
-    policy, _ = Policy.objects.get_or_create(framework=framework, title=title)
-    version_obj, created = PolicyVersion.objects.get_or_create(
-        policy=policy,
-        version=version,
-        defaults={'uploaded_file': None}
-    )
+    section_map = {section.get('section_number'): section.get('content') for section in sections}
+    section_pairs = render_sections(section_map.items())
+    with stage('pdf_render'):
+        key = render_key(title, version, section_pairs)
+        cached_name = cached_render(key)
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-
-    story.append(Paragraph(version, styles['Heading1']))
-    story.append(Paragraph(title, styles['Heading2']))
-
-    for section in sections:
-        section_number = section.get('section_number')
-        content = section.get('content')
-        story.append(Paragraph(f"{section_number}", styles['Heading3']))
-        story.append(Paragraph(content, styles['Normal']))
-
-    doc.build(story)
-    pdf_data = buffer.getvalue()
-    buffer.close()
-
-    from django.core.files.base import ContentFile
-    version_obj.uploaded_file.save(f"{title}_{version}.pdf", ContentFile(pdf_data))
-    version_obj.save()
-
-    existing_sections = PolicySection.objects.filter(version=version_obj)
-    existing_section_map = {s.section_number: s for s in existing_sections}
-    existing_sections.update(archived=True)
-
-    prev_versions = PolicyVersion.objects.filter(policy=policy).exclude(id=version_obj.id).order_by('-created_at')
-    old_sections = {}
-    if prev_versions.exists():
-        prev = prev_versions.first()
-        old_sections = {s.section_number: s.content for s in prev.sections.all()}
-
-    for section in sections:
-        sec_num = section.get('section_number')
-        content = section.get('content')
-        section_obj = existing_section_map.get(sec_num)
-        if section_obj:
-            section_obj.content = content
-            section_obj.archived = False
-            section_obj.save()
-        else:
-            PolicySection.objects.create(
-                version=version_obj,
-                section_number=sec_num,
-                content=content,
-                archived=False
-            )
-
-        old_content = old_sections.get(sec_num, "")
-        if old_content.strip() != content.strip():
-            diff = '\n'.join(difflib.unified_diff(
-                old_content.splitlines(),
-                content.splitlines(),
-                fromfile=f'{prev.version}:{sec_num}' if prev_versions.exists() else 'original',
-                tofile=f'{version}:{sec_num}',
-                lineterm=''
-            ))
-            PolicyDiff.objects.create(version=version_obj, section_number=sec_num, diff_text=diff)
+    version_obj, _ = ingest_sections(framework, title, version, section_map, cached_name, render_key=key)
+    if not cached_name:
+        transaction.on_commit(lambda: schedule_render(version_obj.id, key, title, version, section_pairs))
 
     return JsonResponse({
         'message': f'Policy "{title}" v{version} generated and saved successfully.',
-        'version_id': version_obj.id
+        'version_id': version_obj.id,
+        'render': 'cached' if cached_name else 'queued'
+    })
+
+@csrf_exempt
+@require_POST
+def save_sections(request, version_id):
+    """Incremental editor save: only the changed sections, with base hashes."""
+    try:
+        data = json.loads(request.body)
+        edits = parse_edits(data.get('sections'))
+    except (json.JSONDecodeError, AttributeError, ValueError) as e:
+        return JsonResponse({'error': f'Invalid input: {str(e)}'}, status=400)
+
+    counter = QueryCounter()
+    try:
+        with counter:
+            version_obj, saved = apply_section_edits(version_id, edits)
+    except PolicyVersion.DoesNotExist:
+        return JsonResponse({'error': 'Policy version not found'}, status=404)
+    except EditConflict as e:
+        return JsonResponse({'error': str(e), 'conflicts': e.conflicts}, status=409)
+
+    return JsonResponse({
+        'version_id': version_obj.id,
+        'fingerprint': version_obj.fingerprint,
+        'sections': saved,
+        'query_count': counter.count
     })
 
+HISTORY_FIELDS = ('version_id', 'version', 'created_at', 'changes')
+
 @csrf_exempt
 def policy_change_history(request, policy_id):
-    policy = get_object_or_404(Policy, id=policy_id)
-    versions = PolicyVersion.objects.filter(policy=policy).order_by('-created_at')
-    
-    history = []
-    for version in versions:
-        history.append({
-            'version': version.version,
-            'created_at': version.created_at.isoformat(),
-            'changes': version.change_summary,
-            'version_id': version.id
-        })
-    
-    return JsonResponse({'policy': policy.title, 'history': history})
\ No newline at end of file
+    validators = read_cache.history_validators(policy_id)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    policy = get_object_or_404(Policy.objects.only('id', 'title'), id=policy_id)
+    expand = request.GET.get('expand') in ('1', 'true')
+    stream = request.GET.get('format') == 'ndjson'
+
+    fields = HISTORY_FIELDS
+    if request.GET.get('fields'):
+        fields = tuple(f for f in request.GET['fields'].split(',') if f in HISTORY_FIELDS)
+        if not fields:
+            return JsonResponse({'error': f'fields must be a subset of {",".join(HISTORY_FIELDS)}'}, status=400)
+
+    try:
+        limit = parse_limit(request.GET.get('limit'), None if stream else 50, 500)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+
+    columns = ['id', 'version', 'created_at']
+    if 'changes' in fields:
+        columns.append('change_summary')
+    versions = PolicyVersion.objects.filter(policy=policy).order_by('-created_at', '-id').values(*columns)
+    if request.GET.get('cursor'):
+        try:
+            versions = versions.filter(keyset_filter(request.GET['cursor']))
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    if limit:
+        versions = versions[:limit + 1]
+
+    def entry(row):
+        item = {
+            'version_id': row['id'],
+            'version': row['version'],
+            'created_at': row['created_at'].isoformat(),
+        }
+        if 'changes' in fields:
+            changes = row['change_summary']
+            item['changes'] = expand_change_summary(changes, row['id']) if expand else changes
+        return {k: v for k, v in item.items() if k in fields}
+
+    if stream:
+        def lines():
+            last = None
+            for count, row in enumerate(versions.iterator(chunk_size=100)):
+                if limit and count == limit:
+                    yield json.dumps({'next_cursor': encode_cursor(last['created_at'], last['id'])}) + '\n'
+                    return
+                last = row
+                yield json.dumps(entry(row), cls=DjangoJSONEncoder) + '\n'
+        return add_validators(StreamingHttpResponse(lines(), content_type='application/x-ndjson'), validators)
+
+    rows = list(versions)
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    return add_validators(JsonResponse({
+        'policy': policy.title,
+        'history': [entry(row) for row in rows],
+        'next_cursor': next_cursor
+    }), validators)
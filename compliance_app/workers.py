@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+# WORKER_MODE = 'process' hands CPU-bound work (pdfminer, reportlab) to a
+# process pool and runs orchestration on background threads. 'inline' runs
+# everything synchronously in the caller, which is what the test suite uses
+# since it needs no broker and stays inside the test transaction.
+
+_lock = threading.Lock()
+_process_pool = None
+_thread_pool = None
+
+
+class InlineExecutor:
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+
+_inline = InlineExecutor()
+
+
+def is_inline():
+    return getattr(settings, 'WORKER_MODE', 'process') == 'inline'
+
+
+def process_pool():
+    global _process_pool
+    if is_inline():
+        return _inline
+    with _lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=getattr(settings, 'WORKER_PROCESSES', None))
+        return _process_pool
+
+
+def thread_pool():
+    global _thread_pool
+    if is_inline():
+        return _inline
+    with _lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'WORKER_THREADS', 4),
+                thread_name_prefix='compliance-worker'
+            )
+        return _thread_pool
+
+
+def shutdown(wait=True):
+    """Shut the worker pools down; the next use starts fresh ones."""
+    global _process_pool, _thread_pool
+    with _lock:
+        pools = (_process_pool, _thread_pool)
+        _process_pool = _thread_pool = None
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+def _with_connection(fn, *args, **kwargs):
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        connection.close()
+
+
+def run_in_background(fn, *args, **kwargs):
+    """Run ``fn`` on a background thread that owns its own DB connection."""
+    if is_inline():
+        return _inline.submit(fn, *args, **kwargs)
+    return thread_pool().submit(_with_connection, fn, *args, **kwargs)
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Await CPU-bound ``fn`` on the process pool without blocking the event loop."""
+    return await asyncio.wrap_future(process_pool().submit(fn, *args, **kwargs))
+
+
+async def run_off_loop(fn, *args, **kwargs):
+    """Await blocking ``fn`` (ORM writes, diffing) on the worker thread pool.
+
+    Unlike ``sync_to_async`` this does not queue behind the single thread
+    the async ORM uses, so long writes cannot hold up async reads.
+    """
+    if is_inline():
+        return await sync_to_async(fn)(*args, **kwargs)
+    context = contextvars.copy_context()
+    return await asyncio.wrap_future(thread_pool().submit(context.run, _with_connection, fn, *args, **kwargs))
@@ -38,6 +38,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'compliance_app.middleware.RequestMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'compliance_project.urls'
@@ -118,6 +119,65 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Background ingestion workers. 'process' runs pdfminer in a process pool;
+# 'inline' runs jobs synchronously (used by the test suite).
+
+WORKER_MODE = 'process'
+WORKER_PROCESSES = None
+WORKER_THREADS = 4
+
+# Editor PDFs are re-rendered once a version has gone this many seconds
+# without another incremental section save.
+
+RENDER_COALESCE_SECONDS = 2.0
+
+# Upper bound for cached editor renders under MEDIA_ROOT/renders/ that no
+# version points at any more (LRU eviction).
+
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Route the upload, generate and read endpoints to compliance_app.async_views.
+# asgi.py turns this on, so uvicorn/daphne serve the async views and WSGI
+# servers keep the sync ones.
+
+ASYNC_VIEWS = os.environ.get('COMPLIANCE_ASYNC_VIEWS') == '1'
+
+# Upper bound for the parsed-section cache of uploaded PDFs (LRU eviction).
+
+EXTRACTION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Upper bound for the extracted text of individual PDF pages reused by
+# re-uploads (LRU eviction).
+
+PAGE_TEXT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Section diff algorithm: 'patience', 'myers' or 'difflib'.
+
+DIFF_ENGINE = 'patience'
+
+# Number of version-pair comparisons kept in the in-process LRU cache.
+
+VERSION_COMPARE_CACHE_SIZE = 256
+
+# Minimum shingle Jaccard similarity for pairing a removed section with an
+# added one as a move (compliance_app.similarity).
+
+MOVE_SIMILARITY_THRESHOLD = 0.5
+
+# Read-through cache for frameworks, version headers and section lists
+# (compliance_app.read_cache). Local memory is per process; deployments with
+# several web workers should point this at a shared backend (Redis,
+# Memcached) so invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compliance-read-cache',
+    }
+}
+READ_CACHE_ALIAS = 'default'
+READ_CACHE_TIMEOUT = 300
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
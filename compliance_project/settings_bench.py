@@ -0,0 +1,21 @@
+"""
+Settings for running the benchmark suite locally against SQLite:
+
+    python manage.py run_benchmarks --settings=compliance_project.settings_bench
+
+The database file lives in the system temp directory, not the checkout.
+"""
+
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.gettempdir(), 'compliance-bench.sqlite3'),
+    }
+}
+
+WORKER_MODE = 'inline'